@@ -0,0 +1,55 @@
+"""How long it takes to import vocabulary, in a fresh interpreter.
+
+The inventories (SYLLABLES, WORDFORMS, SHAPES and the tables) are built
+on first use, so a bare import should be much cheaper than an import
+that then uses them, which is what every import used to cost.
+Importing numpy is timed on its own, since vocabulary imports it and
+that is most of what a bare import costs now.
+
+To compare with another version, check it out somewhere else and pass
+its directory, for example:
+    git worktree add /tmp/baseline <commit>
+    python bench_import.py 10 /tmp/baseline
+
+Usage: python bench_import.py [repeats] [directory ...]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {
+    'import vocabulary': 'import vocabulary',
+    'import and build everything': ('import vocabulary, tables\n'
+                                    'vocabulary.SHAPES\n'
+                                    'tables.SIZE'),
+    'import numpy': 'import numpy',
+    'python alone': 'pass',
+    }
+
+
+def seconds(code:str, repeats:int, directory:str='.'):
+    """The median wall time of running code in a new python, in seconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True,
+                       cwd=directory, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    directories = ['.'] + sys.argv[2:]
+    for directory in directories:
+        print(os.path.abspath(directory))
+        for name, code in CASES.items():
+            try:
+                time_ms = seconds(code, repeats, directory) * 1000
+            except subprocess.CalledProcessError:
+                # eg: an old version without tables.
+                print(f'  {name:30} {"failed":>8}')
+                continue
+            print(f'  {name:30} {time_ms:8.1f} ms')
@@ -0,0 +1,166 @@
+"""Saving a search to disk, and picking it up again later.
+
+A checkpoint holds everything needed to carry on where a search left
+off: the assignment, the importances, the running total cost, the
+state of vocab.rng, and the Optimizer's counters and best assignment.
+Wordforms are stored as their indices in WORDFORMS, in small integer
+arrays, all in one .npz file.
+Along with them are hashes of the phonology and the words' sources,
+so a checkpoint can't be loaded into the wrong vocabulary.
+(A strategy's own memory, like a tabu list, is not saved.)
+
+Files are written under a temporary name and then renamed, so a
+checkpoint is never half-written, even if the process is killed.
+A Checkpointer does the writing on a background thread: the search
+only pays for copying a few small arrays.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import tables
+
+
+def _sources_hash(vocab):
+    """A short hash of vocab's words' sources, as an array of bytes."""
+    sources = json.dumps([w.sources for w in vocab.words]).encode()
+    return np.frombuffer(hashlib.sha256(sources).digest(), dtype=np.uint8)
+
+
+def snapshot(vocab, optimizer=None):
+    """The state of vocab (and optimizer) as a dict of small arrays."""
+    dtype = np.uint16 if tables.SIZE <= 1 << 16 else np.uint32
+    version, internal, gauss = vocab.rng.getstate()
+    state = {
+        'phonology': np.array(tables.phonology_key()),
+        'sources': _sources_hash(vocab),
+        'assignment': vocab.indices.astype(dtype),
+        'importances': vocab.importance_array.copy(),
+        'total_cost': np.array(vocab.total_cost),
+        'rng_version': np.array(version),
+        'rng_internal': np.array(internal, dtype=np.uint32),
+        'rng_gauss': np.array(np.nan if gauss is None else gauss),
+        }
+    if optimizer is not None:
+        state.update({
+            'iterations': np.array(optimizer.iterations),
+            'accepted': np.array(optimizer.accepted),
+            'seconds': np.array(optimizer.seconds),
+            'best_cost': np.array(optimizer.best_cost),
+            'best_assignment': np.array(optimizer.best_assignment,
+                                        dtype=dtype),
+            })
+    return state
+
+
+def write(path:str, state:dict):
+    """Write a snapshot() to path, atomically."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        np.savez(f, **state)
+        # on disk before the rename, so path is never left half-written.
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def read(path:str):
+    """The snapshot() saved at path."""
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def resume(path:str, vocab, optimizer=None):
+    """Give vocab (and optimizer) the state saved at path.
+
+    The vocabulary must have the same words as the one that was saved.
+    If it doesn't, or the phonology has changed, raise a ValueError.
+    """
+    state = read(path)
+    if str(state['phonology']) != tables.phonology_key():
+        raise ValueError("The checkpoint is for a different phonology.")
+    if (not np.array_equal(state['sources'], _sources_hash(vocab)) or
+            state['importances'].shape != vocab.importance_array.shape or
+            not np.allclose(state['importances'], vocab.importance_array)):
+        raise ValueError("The checkpoint is for a different vocabulary.")
+    vocab.restore([int(j) for j in state['assignment']])
+    # the running total, exactly as it was, rather than a fresh cost().
+    vocab.total_cost = float(state['total_cost'])
+    gauss = float(state['rng_gauss'])
+    vocab.rng.setstate((int(state['rng_version']),
+                        tuple(int(x) for x in state['rng_internal']),
+                        None if np.isnan(gauss) else gauss))
+    if optimizer is not None and 'iterations' in state:
+        optimizer.iterations = int(state['iterations'])
+        optimizer.accepted = int(state['accepted'])
+        optimizer.seconds = float(state['seconds'])
+        optimizer.best_cost = float(state['best_cost'])
+        optimizer.best_assignment = [int(j)
+                                     for j in state['best_assignment']]
+
+
+class Checkpointer:
+    """Saves checkpoints of a search every so often, on another thread.
+
+    Pass it as the callback of Optimizer.run(). Every interval seconds,
+    it takes a snapshot() between steps, and a background thread writes
+    it to path. If the last one is still being written, the new one
+    waits, and only the latest waiting snapshot is ever written.
+    """
+
+    def __init__(self, path:str, vocab, optimizer, interval:float=60.0):
+        self.path = path
+        self.vocab = vocab
+        self.optimizer = optimizer
+        self.interval = interval
+        self.last = time.perf_counter()
+        self.written = 0
+        self.pending = None
+        self.ready = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    def __call__(self, stats=None):
+        """Take a snapshot if it's time for one."""
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.save()
+
+    def save(self):
+        """Take a snapshot now, to be written as soon as possible."""
+        state = snapshot(self.vocab, self.optimizer)
+        with self.ready:
+            self.pending = state
+            self.ready.notify()
+
+    def _writer(self):
+        while True:
+            with self.ready:
+                while self.pending is None and not self.closed:
+                    self.ready.wait()
+                if self.pending is None:
+                    return
+                state, self.pending = self.pending, None
+            write(self.path, state)
+            self.written += 1
+
+    def close(self):
+        """Save one last snapshot, and wait until it is written."""
+        self.save()
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
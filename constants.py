@@ -1,8 +1,8 @@
-# number of instances to cache in Word and Wordform methods.
-# (for methods that take two instance, this is squared.)
-# (recommend about as many as the size of the vocab,
-#  although significantly fewer seems to somehow work too.)
-CACHINESS = 128
+# where to keep precomputed tables between runs (see tables.use_cache).
+CACHE_DIR = '.cache'
+# the most wordforms whose whole LCS matrix will be saved there.
+# it takes SIZE * SIZE bytes: 400 MB at this size.
+MAX_CACHE_SIZE = 20000
 
 # toki pona's phonology
 ONSETS = ['', 'p', 't', 'k', 's', 'm', 'n', 'l', 'w', 'j']
@@ -16,6 +16,12 @@ CODAS = ['', 'n']
 # wuwojiti are illegal substrings in any position
 ILLEGAL_SUBSTRINGS = ['wu', 'wo', 'ji', 'ti']
 
+# a coda can't come right before certain onsets: n before m or n.
+ILLEGAL_JOINS = [('n', 'm'), ('n', 'n')]
+
+# onsetless syllables can only start a word.
+MEDIAL_ONSETS_REQUIRED = True
+
 
 # Double toki pona phonology
 """
@@ -53,4 +59,5 @@ CODAS = ([''] + list('pbtdkg') + list('fvszh') +
           ['x'])
 
 ILLEGAL_SUBSTRINGS = []
+ILLEGAL_JOINS = []
 """
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""Search strategies for lowering the cost of a Vocabulary.
+
+An Optimizer runs a Strategy on a Vocabulary for a budget of iterations,
+seconds, or iterations without improvement, and keeps the best
+assignment it has seen. Each Strategy.step() proposes and maybe accepts
+one move, using the vocabulary's running total_cost and move_delta().
+"""
+import math
+import time
+from collections import deque
+
+
+def constant_temperature(temperature:float):
+    """A cooling schedule that never cools."""
+    return lambda progress: temperature
+
+
+def linear_cooling(start:float, end:float):
+    """A cooling schedule from start to end, in equal steps."""
+    return lambda progress: start + (end - start) * progress
+
+
+def exponential_cooling(start:float, end:float):
+    """A cooling schedule from start to end, by a constant factor per step."""
+    return lambda progress: start * (end / start) ** progress
+
+
+class Strategy:
+    """A way of deciding which changes to make to a Vocabulary.
+
+    Changes are drawn from three kinds of moves, with the given weights:
+    'change' gives one word a new wordform,
+    'swap' exchanges the wordforms of two words,
+    and 'rotation' rotates the wordforms of three words.
+    """
+
+    name = 'strategy'
+
+    def __init__(self, moves:dict=None):
+        self.moves = moves or {'change': 0.8, 'swap': 0.15, 'rotation': 0.05}
+
+    def propose(self, vocab):
+        """A random move for vocab, as a dict from Word to Wordform.
+
+        Return None if the move isn't possible (eg: the wordform is taken).
+        """
+        kind, = vocab.rng.choices(list(self.moves),
+                                  weights=list(self.moves.values()))
+        if kind == 'change':
+            move = vocab.random_move()
+            return None if move is None else dict([move])
+        if kind == 'swap':
+            return vocab.random_swap()
+        if kind == 'rotation':
+            return vocab.random_rotation(3)
+        raise ValueError(f"Unknown kind of move: {kind}")
+
+    def start(self, vocab):
+        """Prepare to search the given vocabulary."""
+        pass
+
+    def step(self, vocab, progress:float):
+        """Propose one change and maybe make it. Return whether it was made.
+
+        progress is how much of the budget has been used, from 0 to 1.
+        (It stays 0 if the budget is only iterations without improvement.)
+        """
+        raise NotImplementedError
+
+
+class Greedy(Strategy):
+    """Make random moves that don't make the cost worse.
+
+    This is pure hill climbing. With only 'change' moves,
+    it is the same as Vocabulary.alter_if_better().
+    """
+
+    name = 'greedy'
+
+    def step(self, vocab, progress:float):
+        move = self.propose(vocab)
+        if move is None:
+            return False
+        delta = vocab.move_delta(move)
+        if delta > 0:
+            return False
+        vocab.make_move(move, delta)
+        return True
+
+
+class SimulatedAnnealing(Strategy):
+    """Make random changes, sometimes accepting worse ones.
+
+    A change that raises the cost by delta is accepted with probability
+    exp(-delta / temperature). The temperature is schedule(progress).
+    """
+
+    name = 'annealing'
+
+    def __init__(self, schedule=None, moves:dict=None):
+        super().__init__(moves)
+        # costs are importance-weighted and sum to a few points,
+        # so a typical single change is worth hundredths of a point.
+        self.schedule = schedule or exponential_cooling(0.05, 0.0001)
+
+    def step(self, vocab, progress:float):
+        move = self.propose(vocab)
+        if move is None:
+            return False
+        delta = vocab.move_delta(move)
+        if delta > 0:
+            temperature = self.schedule(progress)
+            if temperature <= 0:
+                return False
+            if vocab.rng.random() >= math.exp(-delta / temperature):
+                return False
+        vocab.make_move(move, delta)
+        return True
+
+
+class Tabu(Strategy):
+    """Make the best of several random changes, even if it is worse.
+
+    To avoid cycling, a word may not go back to a wordform it had
+    in the last `tenure` changes, unless that would be a new best cost.
+    """
+
+    name = 'tabu'
+
+    def __init__(self, tenure:int=50, neighborhood:int=20, moves:dict=None):
+        super().__init__(moves)
+        self.tenure = tenure
+        self.neighborhood = neighborhood
+
+    def start(self, vocab):
+        self.recent = deque()
+        self.best_cost = vocab.total_cost
+
+    def is_tabu(self, move):
+        return any((w, wf) in self.recent for w, wf in move.items())
+
+    def step(self, vocab, progress:float):
+        best_move, best_delta = None, math.inf
+        for _ in range(self.neighborhood):
+            move = self.propose(vocab)
+            if move is None:
+                continue
+            delta = vocab.move_delta(move)
+            new_best = vocab.total_cost + delta < self.best_cost
+            if self.is_tabu(move) and not new_best:
+                continue
+            if delta < best_delta:
+                best_move, best_delta = move, delta
+        if best_move is None:
+            return False
+        for word in best_move:
+            self.recent.append((word, vocab.wordforms[word]))
+        while len(self.recent) > self.tenure:
+            self.recent.popleft()
+        vocab.make_move(best_move, best_delta)
+        self.best_cost = min(self.best_cost, vocab.total_cost)
+        return True
+
+
+class LateAcceptance(Strategy):
+    """Accept a random change if it's no worse than the cost some time ago.
+
+    This is late acceptance hill climbing: a change is accepted if the new
+    cost is no worse than the current cost, or than the cost `length`
+    steps ago.
+    """
+
+    name = 'late acceptance'
+
+    def __init__(self, length:int=1000, moves:dict=None):
+        super().__init__(moves)
+        self.length = length
+
+    def start(self, vocab):
+        self.history = [vocab.total_cost] * self.length
+        self.steps = 0
+
+    def step(self, vocab, progress:float):
+        v = self.steps % self.length
+        self.steps += 1
+        accepted = False
+        move = self.propose(vocab)
+        if move is not None:
+            delta = vocab.move_delta(move)
+            new_cost = vocab.total_cost + delta
+            if delta <= 0 or new_cost <= self.history[v]:
+                vocab.make_move(move, delta)
+                accepted = True
+        self.history[v] = vocab.total_cost
+        return accepted
+
+
+class Optimizer:
+    """Runs a Strategy on a Vocabulary and keeps track of how it's going."""
+
+    def __init__(self, vocab, strategy:Strategy=None):
+        self.vocab = vocab
+        self.strategy = strategy or Greedy()
+        self.iterations = 0
+        self.accepted = 0
+        self.seconds = 0.0
+        self.best_cost = vocab.total_cost
+        self.best_assignment = vocab.assignment()
+
+    def run(self, iterations:int=None, seconds:float=None,
+            plateau:int=None, callback=None, report_every:int=1000,
+            restore_best:bool=True, total:bool=False):
+        """Run the strategy until a budget is used up. Return stats().
+
+        The budgets are a number of iterations, a number of seconds,
+        and a number of iterations in a row without a new best cost.
+        With no budget at all, run forever.
+        With total True, the iterations and seconds budgets are for the
+        whole search so far (self.iterations and self.seconds, which may
+        have been restored from a checkpoint), not just this run, so a
+        resumed search carries on where it stopped, schedule and all.
+        If callback is given, it is called with stats() every
+        report_every iterations.
+        Afterwards, the vocabulary gets the best assignment seen,
+        unless restore_best is False.
+        """
+        self.strategy.start(self.vocab)
+        last = time.perf_counter()
+        elapsed = self.seconds if total else 0.0
+        i = self.iterations if total else 0
+        since_best = 0
+        while True:
+            if iterations is not None and i >= iterations:
+                break
+            if seconds is not None and elapsed >= seconds:
+                break
+            if plateau is not None and since_best >= plateau:
+                break
+            # progress through the budget, from 0 to 1.
+            progress = 0.0
+            if iterations:
+                progress = max(progress, i / iterations)
+            if seconds:
+                progress = max(progress, elapsed / seconds)
+            if self.strategy.step(self.vocab, progress):
+                self.accepted += 1
+                if self.vocab.total_cost < self.best_cost:
+                    self.best_cost = self.vocab.total_cost
+                    self.best_assignment = self.vocab.assignment()
+                    since_best = -1
+            i += 1
+            since_best += 1
+            self.iterations += 1
+            now = time.perf_counter()
+            elapsed += now - last
+            self.seconds += now - last
+            last = now
+            if callback is not None and i % report_every == 0:
+                callback(self.stats())
+        if restore_best:
+            self.vocab.restore(self.best_assignment)
+        return self.stats()
+
+    def stats(self):
+        """How the search has gone so far, as a dict."""
+        return {
+            'strategy': self.strategy.name,
+            'iterations': self.iterations,
+            'seconds': self.seconds,
+            'iterations_per_second': (self.iterations / self.seconds
+                                      if self.seconds else 0.0),
+            'acceptance_rate': (self.accepted / self.iterations
+                                if self.iterations else 0.0),
+            'cost': self.vocab.total_cost,
+            'best_cost': self.best_cost,
+            }
@@ -0,0 +1,155 @@
+"""Searching for a Vocabulary on several cores at once.
+
+Each replica is a separate process with its own Vocabulary, Optimizer
+and seeded RNG. The driver talks to the replicas in rounds: every round,
+each replica searches for a while and sends back its costs and
+assignments. Assignments are lists of wordform indices (see
+Vocabulary.assignment()), so no Word or Wordform objects go between
+processes after startup.
+
+Without temperatures, the replicas are independent annealing restarts.
+With temperatures, this is parallel tempering: each replica searches
+at a fixed temperature, and after each round neighboring temperatures
+may exchange their current assignments.
+"""
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import tables
+from vocabulary import Vocabulary
+from optimizer import Optimizer, SimulatedAnnealing, constant_temperature
+
+
+def _replica(connection, words, importances, seed, temperature, cache):
+    """Run one replica, following the driver's commands until 'stop'."""
+    if cache is not None:
+        tables.use_cache(cache)
+    vocab = Vocabulary(words, importances, seed=seed, verbose=False)
+    if temperature is None:
+        strategy = SimulatedAnnealing()
+    else:
+        strategy = SimulatedAnnealing(constant_temperature(temperature))
+    optimizer = Optimizer(vocab, strategy)
+    while True:
+        command, argument = connection.recv()
+        if command == 'run':
+            # tempering replicas keep their current state between rounds;
+            # restarts go back to their best state and anneal again.
+            optimizer.run(seconds=argument,
+                          restore_best=temperature is None)
+            connection.send((vocab.total_cost, vocab.assignment(),
+                             optimizer.best_cost, optimizer.best_assignment,
+                             optimizer.stats()))
+        elif command == 'set':
+            vocab.restore(argument)
+            connection.send(vocab.total_cost)
+        elif command == 'stop':
+            connection.close()
+            return
+
+
+class ParallelSearch:
+    """Several replicas of a Vocabulary search, in separate processes."""
+
+    def __init__(self, words:list, importances:list=None,
+                 replicas:int=None, temperatures:list=None, seed:int=None,
+                 cache:str=None):
+        """Start the replicas.
+
+        There is one replica per temperature if temperatures are given,
+        and otherwise `replicas` of them (by default, one per core).
+        Replica k is seeded with seed + k.
+        If cache is a directory, the replicas share the tables saved there
+        (see tables.use_cache).
+        """
+        if cache is not None:
+            # build the cache once here, not once per replica.
+            tables.use_cache(cache)
+        if temperatures is not None:
+            replicas = len(temperatures)
+        else:
+            replicas = replicas or os.cpu_count()
+            temperatures = [None] * replicas
+        self.temperatures = temperatures
+        self.rng = random.Random(seed)
+        self.best_cost = math.inf
+        self.best_assignment = None
+        self.swaps = self.swap_attempts = 0
+        self.stats = []
+        self.connections = []
+        self.processes = []
+        for k, temperature in enumerate(temperatures):
+            replica_seed = None if seed is None else seed + k
+            ours, theirs = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_replica,
+                args=(theirs, words, importances, replica_seed, temperature,
+                      cache),
+                daemon=True)
+            process.start()
+            self.connections.append(ours)
+            self.processes.append(process)
+
+    def run(self, seconds:float, interval:float=1.0):
+        """Search until the deadline, seconds from now.
+
+        Every interval seconds, collect the best vocabulary found so far
+        (and in parallel tempering, try to exchange states).
+        Return (best_cost, best_assignment).
+        """
+        deadline = time.perf_counter() + seconds
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self.round(min(interval, remaining))
+        return self.best_cost, self.best_assignment
+
+    def round(self, seconds:float):
+        """Let every replica search for the given number of seconds."""
+        for connection in self.connections:
+            connection.send(('run', seconds))
+        results = [connection.recv() for connection in self.connections]
+        self.stats = [stats for *_, stats in results]
+        for _, _, best_cost, best_assignment, _ in results:
+            if best_cost < self.best_cost:
+                self.best_cost = best_cost
+                self.best_assignment = best_assignment
+        if self.temperatures[0] is not None:
+            self.exchange([(cost, assignment)
+                           for cost, assignment, *_ in results])
+
+    def exchange(self, states:list):
+        """Maybe exchange states between neighboring temperatures.
+
+        The replicas at temperatures T1 and T2, with costs E1 and E2,
+        swap with probability min(1, exp((1/T1 - 1/T2) * (E1 - E2))).
+        """
+        for k in range(len(states) - 1):
+            t1, t2 = self.temperatures[k], self.temperatures[k + 1]
+            (e1, a1), (e2, a2) = states[k], states[k + 1]
+            self.swap_attempts += 1
+            exponent = (1 / t1 - 1 / t2) * (e1 - e2)
+            if exponent >= 0 or self.rng.random() < math.exp(exponent):
+                states[k], states[k + 1] = (e2, a2), (e1, a1)
+                self.connections[k].send(('set', a2))
+                self.connections[k + 1].send(('set', a1))
+                self.connections[k].recv()
+                self.connections[k + 1].recv()
+                self.swaps += 1
+
+    def close(self):
+        """Stop all the replicas."""
+        for connection in self.connections:
+            connection.send(('stop', None))
+        for process in self.processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
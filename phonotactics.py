@@ -0,0 +1,104 @@
+"""The rules for which sequences of syllables make a legal word.
+
+All the rules in constants.py are compiled into one finite automaton
+over syllables:
+- no ILLEGAL_SUBSTRINGS anywhere, even across syllable boundaries,
+- no coda and onset from ILLEGAL_JOINS next to each other,
+- and (if MEDIAL_ONSETS_REQUIRED) no onsetless syllable after the first.
+Each state remembers just enough about the word so far: the last coda,
+and how much of an illegal substring the word currently ends with.
+Checking or extending a word is then one table lookup per syllable.
+"""
+from constants import (ONSETS, VOWELS, CODAS, ILLEGAL_SUBSTRINGS,
+                       ILLEGAL_JOINS, MEDIAL_ONSETS_REQUIRED)
+
+# the state of any illegal word.
+DEAD = -1
+
+
+class Phonotactics:
+    """A finite automaton that accepts exactly the legal words."""
+
+    def __init__(self, onsets:list, vowels:list, codas:list,
+                 illegal_substrings:list=(), illegal_joins:list=(),
+                 medial_onsets_required:bool=True):
+        # the alphabet: every (onset, vowel, coda), in the order of
+        # nested loops over onsets, vowels, and codas.
+        self.syllables = [(o, v, c)
+                          for o in onsets for v in vowels for c in codas]
+        self.ids = {syl: i for i, syl in enumerate(self.syllables)}
+        self.illegal_substrings = [s for s in illegal_substrings if s]
+        self.illegal_joins = set(illegal_joins)
+        self.medial_onsets_required = medial_onsets_required
+        # the substring part of a state is the longest suffix of the word
+        # that is a prefix of some illegal substring.
+        self.prefixes = {''}
+        for s in self.illegal_substrings:
+            for k in range(1, len(s)):
+                self.prefixes.add(s[:k])
+        # states are (substring state, last coda), or the start.
+        self.start = 0
+        self.states = [None]
+        numbers = {None: 0}
+        self.table = []
+        # build the table breadth first, from the start.
+        for state in self.states:
+            row = []
+            for syl in self.syllables:
+                following = self._follow(state, syl)
+                if following is None:
+                    row.append(DEAD)
+                    continue
+                if following not in numbers:
+                    numbers[following] = len(self.states)
+                    self.states.append(following)
+                row.append(numbers[following])
+            self.table.append(row)
+        # the legal next syllables from each state, with the next state.
+        self.followers = [[(i, j) for i, j in enumerate(row) if j != DEAD]
+                          for row in self.table]
+
+    def _follow(self, state, syllable):
+        """The state after adding syllable to a word in state, or None."""
+        onset, vowel, coda = syllable
+        if state is None:
+            suffix = ''
+        else:
+            suffix, last_coda = state
+            if onset == '' and self.medial_onsets_required:
+                return None
+            if (last_coda, onset) in self.illegal_joins:
+                return None
+        for letter in onset + vowel + coda:
+            suffix += letter
+            if any(suffix.endswith(s) for s in self.illegal_substrings):
+                return None
+            while suffix not in self.prefixes:
+                suffix = suffix[1:]
+        return (suffix, coda)
+
+    def step(self, state:int, syllable:tuple):
+        """The state after adding (onset, vowel, coda) to a word in state."""
+        if state == DEAD:
+            return DEAD
+        return self.table[state][self.ids[syllable]]
+
+    def run(self, syllables:list):
+        """The state after the given (onset, vowel, coda)s, from the start."""
+        state = self.start
+        for syl in syllables:
+            i = self.ids.get(syl)
+            if i is None:
+                return DEAD
+            state = self.table[state][i]
+            if state == DEAD:
+                return DEAD
+        return state
+
+    def accepts(self, syllables:list):
+        """Are the given (onset, vowel, coda)s a legal word?"""
+        return len(syllables) > 0 and self.run(syllables) != DEAD
+
+
+PHONOTACTICS = Phonotactics(ONSETS, VOWELS, CODAS, ILLEGAL_SUBSTRINGS,
+                            ILLEGAL_JOINS, MEDIAL_ONSETS_REQUIRED)
@@ -0,0 +1,89 @@
+"""A small local JSON-over-HTTP service for Vocabulary.suggest().
+
+The vocabulary (and the tables it uses) stays in memory between
+requests, so each suggestion only costs the few rows it needs.
+Requests are handled on their own threads, and one lock keeps them
+from using the vocabulary at the same time.
+
+POST /suggest with a JSON object:
+    {"source": "kalensi", "importance": 0.01, "k": 10}
+or, for a word with several sources (see Word):
+    {"sources": {"kalensi": 2, "moneta": 1}, "importance": 0.01}
+and get back:
+    {"suggestions": [{"wordform": "kalen", "delta": 0.123}, ...]}
+"""
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from word import Word
+
+
+class SuggestHandler(BaseHTTPRequestHandler):
+    """Answers POST /suggest for the server's vocabulary."""
+
+    def do_POST(self):
+        if self.path != '/suggest':
+            self.reply(404, {'error': f"No such path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            word, importance, k = self.parse(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self.reply(400, {'error': str(e)})
+            return
+        with self.server.lock:
+            suggestions = self.server.vocab.suggest(word, importance, k)
+        self.reply(200, {'suggestions': [
+            {'wordform': wf.spelling(), 'delta': delta}
+            for wf, delta in suggestions]})
+
+    def parse(self, request):
+        """The Word, importance and k asked for, or raise a ValueError."""
+        if not isinstance(request, dict):
+            raise ValueError("Expected a JSON object.")
+        if 'sources' in request:
+            sources = request['sources']
+            if not (isinstance(sources, dict) and all(
+                    isinstance(w, (int, float)) and math.isfinite(w)
+                    for w in sources.values())):
+                raise ValueError("sources must map spellings to numbers.")
+            word = Word(sources=sources)
+        else:
+            source = request.get('source', '')
+            if not isinstance(source, str):
+                raise ValueError("source must be a string.")
+            word = Word(source)
+        importance = float(request['importance'])
+        k = int(request.get('k', 10))
+        if not (math.isfinite(importance) and importance > 0) or k < 0:
+            raise ValueError("Need a positive importance and k >= 0.")
+        return word, importance, k
+
+    def reply(self, status:int, body:dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # quiet, unless the server says otherwise.
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(vocab, host:str='127.0.0.1', port:int=8000,
+                verbose:bool=False):
+    """A server for suggestions from vocab. Call serve_forever() to run it.
+
+    With port 0, any free port is used (see server.server_address).
+    """
+    server = ThreadingHTTPServer((host, port), SuggestHandler)
+    server.vocab = vocab
+    server.lock = threading.Lock()
+    server.verbose = verbose
+    return server
@@ -1,9 +1,39 @@
-from constants import ONSETS, VOWELS, CODAS, ILLEGAL_SUBSTRINGS
+import weakref
+
+from constants import ONSETS, VOWELS, CODAS
+from phonotactics import PHONOTACTICS
 
 class Syllable:
-    def __init__(self, syllable:str):
-        """Create a syllable from the given string."""
+    """A syllable. There is only ever one Syllable for each spelling.
+
+    Syllables are immutable, and everything about them is worked out
+    once, when the syllable is first created.
+    """
+
+    __slots__ = ('onset', 'vowel', 'coda',
+                 '_spelling', '_shape', '_first_sound', '__weakref__')
+
+    # the one Syllable for each spelling that is still in use.
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, syllable:str):
+        """Create a syllable from the given string, or reuse the old one."""
+        self = cls._interned.get(syllable)
+        if self is not None:
+            return self
+        self = super().__new__(cls)
         self.onset, self.vowel, self.coda = Syllable.parse(syllable)
+        self._spelling = self.onset + self.vowel + self.coda
+        self._shape = (('P' if self.onset else '') +
+                       ('O' if self.vowel else '') +
+                       ('N' if self.coda else ''))
+        self._first_sound = self.onset or self.vowel
+        cls._interned[syllable] = self
+        return self
+
+    def __reduce__(self):
+        """Pickle as the spelling, so unpickling finds the same Syllable."""
+        return (Syllable, (self._spelling,))
 
     def parse(syllable:str):
         """Try to parse the given syllable. Return (onset, vowel, coda).
@@ -31,7 +61,7 @@ class Syllable:
     
     def first_sound(self):
         """The first sound (onset or vowel) of the syllable."""
-        return self.onset or self.vowel
+        return self._first_sound
 
     def shape(self):
         """The "shape" of the syllable: O, PO, ON, or PON.
@@ -39,14 +69,11 @@ class Syllable:
         Onsets become P, vowels become O, final n becomes N.
         Examples: a is O, ma is PO, en is ON, kin is PON.
         """
-        shape = (('P' if self.onset else '') +
-                 ('O' if self.vowel else '') +
-                 ('N' if self.coda else ''))
-        return shape
+        return self._shape
     
     def spelling(self):
         """The actual letters of the syllable, spelled in order."""
-        return self.onset + self.vowel + self.coda
+        return self._spelling
 
     def __repr__(self):
         """An unambiguous string representation of the syllable."""
@@ -62,14 +89,27 @@ class Syllable:
         that relies on spelling."""
         return self.onset + self.vowel + self.coda
     
-# generate all legal syllables.
-SYLLABLES = []
+# every string that Syllable.parse() accepts, with its Syllable.
+# (this includes syllables like wu that are not legal, and not in SYLLABLES.)
+SYLLABLE_TABLE = {}
 for o in ONSETS:
     for v in VOWELS:
         for c in CODAS:
             syl = o + v + c
-            for ill in ILLEGAL_SUBSTRINGS:
-                if ill in syl:
-                    break
-            else:
-                SYLLABLES.append(Syllable(syl))
\ No newline at end of file
+            try:
+                SYLLABLE_TABLE[syl] = Syllable(syl)
+            except ValueError:
+                # only possible with sounds that are more than one letter.
+                pass
+MAX_SYLLABLE_LENGTH = max(len(syl) for syl in SYLLABLE_TABLE)
+
+
+def __getattr__(name):
+    """Build SYLLABLES the first time it is used, and keep it."""
+    global SYLLABLES
+    if name == 'SYLLABLES':
+        # all legal syllables: the ones that can start a word.
+        SYLLABLES = [SYLLABLE_TABLE[''.join(PHONOTACTICS.syllables[i])]
+                     for i, _ in PHONOTACTICS.followers[PHONOTACTICS.start]]
+        return SYLLABLES
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
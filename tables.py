@@ -0,0 +1,372 @@
+"""Pairwise cost tables over the WORDFORMS universe, as NumPy arrays.
+
+Every Wordform in WORDFORMS has an integer index (wordform.index).
+The per-wordform properties are stored as arrays in that order,
+and each pairwise component is available as a row: the component
+between one wordform and every wordform in WORDFORMS, in one array.
+
+Similarity rows are expensive (a longest common subsequence per pair),
+so they are computed on first use, all at once for the whole row
+(see utils.StringBatch), and kept.
+The other components are cheap comparisons of codes.
+
+With use_cache(), the whole matrix of longest common subsequences is
+built once and saved on disk, keyed by a hash of the phonology.
+Later runs (and other processes) map the same file into memory,
+so they share its pages instead of each computing their own rows.
+The matrix grows with the square of the universe, so above
+MAX_CACHE_SIZE wordforms it is not saved, and rows are computed
+as usual.
+
+Nothing is built when this module is imported: WORDFORMS and the
+per-wordform arrays are built the first time any of them is needed.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from constants import (ONSETS, VOWELS, CODAS, ILLEGAL_SUBSTRINGS,
+                       ILLEGAL_JOINS, MEDIAL_ONSETS_REQUIRED, CACHE_DIR,
+                       MAX_CACHE_SIZE)
+
+from trie import Trie
+import utils
+from utils import StringBatch, soft_minimum
+import wordform
+
+# the tables, built by _build() the first time any of them is needed.
+_LAZY = ('WORDFORMS', 'SIZE', 'SPELLINGS', 'INDEX', 'LENGTHS',
+         'INHERENT_COSTS', 'LETTERS', 'SHAPE_CODES', 'FIRST_SOUND_CODES',
+         'SHAPE_COUNT', 'FIRST_SOUND_COUNT', 'SHAPES', 'FIRST_SOUNDS',
+         '_BATCH', '_TRIE')
+_built = False
+
+_similarity_rows = {}
+_prefix_partners = {}
+
+# bump this whenever the files written by build_cache() change.
+CACHE_VERSION = 1
+# the memory-mapped LCS matrix and the directory it is in,
+# if use_cache() has been called.
+_lcs_matrix = None
+_cache_path = None
+
+
+def _build():
+    """Build the per-wordform tables, unless they are already built."""
+    global _built, WORDFORMS, SIZE, SPELLINGS, INDEX, LENGTHS, INHERENT_COSTS
+    global LETTERS, SHAPE_CODES, FIRST_SOUND_CODES, SHAPES, FIRST_SOUNDS
+    global SHAPE_COUNT, FIRST_SOUND_COUNT
+    global _BATCH, _TRIE
+    if _built:
+        return
+    WORDFORMS = wordform.WORDFORMS
+    SIZE = len(WORDFORMS)
+
+    SPELLINGS = [wf.spelling() for wf in WORDFORMS]
+    INDEX = {s: i for i, s in enumerate(SPELLINGS)}
+    LENGTHS = np.array([len(s) for s in SPELLINGS])
+    INHERENT_COSTS = np.array([wf.inherent_cost() for wf in WORDFORMS])
+
+    # letters of each spelling as codes, padded with -1 past the end.
+    LETTERS = np.full((SIZE, LENGTHS.max()), -1)
+    for i, s in enumerate(SPELLINGS):
+        LETTERS[i, :len(s)] = [ord(c) for c in s]
+
+    # shapes and first sounds as small integer codes.
+    shapes = sorted(set(wf.shape() for wf in WORDFORMS))
+    SHAPE_CODES = np.array([shapes.index(wf.shape()) for wf in WORDFORMS])
+    first_sounds = sorted(set(wf.first_sound() for wf in WORDFORMS))
+    FIRST_SOUND_CODES = np.array([first_sounds.index(wf.first_sound())
+                                  for wf in WORDFORMS])
+    SHAPE_COUNT, FIRST_SOUND_COUNT = len(shapes), len(first_sounds)
+
+    SHAPES = np.array([wf.shape() for wf in WORDFORMS])
+    FIRST_SOUNDS = np.array([wf.first_sound() for wf in WORDFORMS])
+
+    # all the spellings, for bit-parallel comparison with one string at
+    # a time, and as a trie, for finding the prefixes of a spelling.
+    _BATCH = StringBatch(SPELLINGS)
+    _TRIE = Trie((s, i) for i, s in enumerate(SPELLINGS))
+    _built = True
+
+
+def __getattr__(name):
+    """Build the tables the first time one is used from outside."""
+    if name in _LAZY:
+        _build()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def index(wordform):
+    """The index of the given wordform in WORDFORMS, or a ValueError."""
+    _build()
+    if wordform.index is not None:
+        return wordform.index
+    try:
+        return INDEX[wordform.spelling()]
+    except KeyError:
+        raise ValueError(f"Not in WORDFORMS: {wordform}")
+
+
+def lcs_lengths(s:str):
+    """Longest common subsequence of s with every wordform, as an array."""
+    _build()
+    return _BATCH.lcs_lengths(s)
+
+
+def edit_distances(s:str):
+    """Edit distance from s to every wordform, as an array."""
+    _build()
+    return _BATCH.edit_distances(s)
+
+
+def source_cost_row(source:str):
+    """Word(source).source_cost() of every wordform, as an array."""
+    _build()
+    cost = edit_distances(source).astype(float)
+    if len(source) > 0:
+        cost -= FIRST_SOUNDS == source[0]
+    return cost
+
+
+def source_cost_matrix(sources:list, softness:float=0):
+    """The source costs of some words with every wordform, in one array.
+
+    Each entry of sources is one word's source spelling, or its
+    (spelling, weight) pairs (see Word.sources). There is a row for each
+    word and a column for each wordform. A word with several sources
+    gets utils.soft_minimum() of their source_cost_row()s, so the work
+    grows with the number of sources, one bit-parallel pass each.
+    Costs from single sources are small integers, stored as int8;
+    soft minimums are stored as float32.
+    While use_cache() is on, the matrix is saved with the other tables,
+    and the same list of sources loads it from there next time.
+    """
+    _build()
+    sources = [[(s, 1.0)] if isinstance(s, str) else [tuple(p) for p in s]
+               for s in sources]
+    longest = max((len(s) for pairs in sources for s, _ in pairs), default=0)
+    if softness == 0 or all(len(pairs) == 1 for pairs in sources):
+        dtype = np.int8 if longest < 127 else np.int16
+    else:
+        dtype = np.float32
+    if _cache_path is None:
+        return _source_cost_matrix(sources, softness, dtype)
+    key = hashlib.sha256(json.dumps([sources, softness]).encode())
+    path = os.path.join(_cache_path, f'sources-{key.hexdigest()[:16]}.npy')
+    try:
+        costs = np.load(path)
+        if costs.shape == (len(sources), SIZE):
+            return costs
+    except (OSError, ValueError):
+        pass
+    costs = _source_cost_matrix(sources, softness, dtype)
+    temporary = os.path.join(_cache_path, f'sources.{os.getpid()}.tmp.npy')
+    with open(temporary, 'wb') as f:
+        np.save(f, costs)
+    os.replace(temporary, path)
+    return costs
+
+
+def _source_cost_matrix(sources:list, softness:float, dtype):
+    costs = np.empty((len(sources), SIZE), dtype=dtype)
+    for i, pairs in enumerate(sources):
+        costs[i] = sources_cost_row(pairs, softness)
+    return costs
+
+
+def sources_cost_row(pairs:list, softness:float=0):
+    """The source cost of every wordform for a word with several sources.
+
+    pairs are (spelling, weight), as in Word.sources, and the costs for
+    each spelling are combined with utils.soft_minimum().
+    """
+    if len(pairs) == 1:
+        return source_cost_row(pairs[0][0])
+    rows = [source_cost_row(s) for s, _ in pairs]
+    return soft_minimum(rows, [w for _, w in pairs], softness)
+
+
+def similarity_row(i:int):
+    """similarity_cost between WORDFORMS[i] and every wordform."""
+    _build()
+    if _lcs_matrix is not None:
+        return (_lcs_matrix[i] / np.maximum(LENGTHS[i], LENGTHS)) ** 2
+    if i not in _similarity_rows:
+        lcs = lcs_lengths(SPELLINGS[i])
+        longer = np.maximum(LENGTHS[i], LENGTHS)
+        _similarity_rows[i] = (lcs / longer) ** 2
+    return _similarity_rows[i]
+
+
+def similarity_block(rows, columns):
+    """similarity_cost between each of WORDFORMS[rows] and WORDFORMS[columns].
+
+    Return an array with a row for each of rows. Unlike similarity_row(),
+    this never keeps anything, so its memory is just the block itself:
+    it gathers from the cached matrix if use_cache() is on, and otherwise
+    uses rows that are already kept or computes them afresh.
+    """
+    _build()
+    rows, columns = np.asarray(rows), np.asarray(columns)
+    longer = np.maximum(LENGTHS[rows][:, np.newaxis], LENGTHS[columns])
+    if _lcs_matrix is not None:
+        return (_lcs_matrix[rows[:, np.newaxis], columns] / longer) ** 2
+    block = np.empty(longer.shape)
+    for r, i in enumerate(rows):
+        if i in _similarity_rows:
+            block[r] = _similarity_rows[i][columns]
+        else:
+            block[r] = (lcs_lengths(SPELLINGS[i])[columns] / longer[r]) ** 2
+    return block
+
+
+def word_shape_row(i:int):
+    """word_shape_cost between WORDFORMS[i] and every wordform."""
+    _build()
+    return (SHAPE_CODES == SHAPE_CODES[i]).astype(float)
+
+
+def first_sound_row(i:int):
+    """first_sound_cost between WORDFORMS[i] and every wordform."""
+    _build()
+    return (FIRST_SOUND_CODES == FIRST_SOUND_CODES[i]).astype(float)
+
+
+def prefix_row(i:int):
+    """prefix_cost between WORDFORMS[i] and every wordform."""
+    _build()
+    shorter = np.minimum(LENGTHS[i], LENGTHS)
+    # letters only need to agree up to the end of the shorter spelling.
+    past_end = np.arange(LETTERS.shape[1]) >= shorter[:, np.newaxis]
+    is_prefix = np.all((LETTERS == LETTERS[i]) | past_end, axis=1)
+    return np.where(is_prefix, 2 + shorter, 0).astype(float)
+
+
+def rows_of(wordform):
+    """The rows of any wordform, even one that isn't in WORDFORMS.
+
+    Return its similarity, word shape, first sound and prefix rows,
+    the same as similarity_row(i) and so on would for WORDFORMS[i].
+    """
+    _build()
+    s = wordform.spelling()
+    similarity = (lcs_lengths(s) / np.maximum(len(s), LENGTHS)) ** 2
+    shape = (SHAPES == wordform.shape()).astype(float)
+    first_sound = (FIRST_SOUNDS == wordform.first_sound()).astype(float)
+    prefix = np.zeros(SIZE)
+    for t, j in _TRIE.ancestors(s):
+        prefix[j] = 2 + len(t)
+    for t, j in _TRIE.descendants(s):
+        prefix[j] = 2 + len(s)
+    return similarity, shape, first_sound, prefix
+
+
+def prefix_partners(i:int):
+    """The wordforms with a prefix_cost with WORDFORMS[i], and those costs.
+
+    Return (indices, costs), as two arrays. These are the ancestors and
+    descendants of the spelling in the trie of all spellings, so only
+    the few related wordforms are visited, not all of them.
+    """
+    _build()
+    if i not in _prefix_partners:
+        s = SPELLINGS[i]
+        partners = {j: 2 + len(t) for t, j in _TRIE.ancestors(s)}
+        for t, j in _TRIE.descendants(s):
+            partners[j] = 2 + len(s)
+        _prefix_partners[i] = (np.array(list(partners), dtype=int),
+                               np.array(list(partners.values()), dtype=float))
+    return _prefix_partners[i]
+
+
+def prefix_cost(i:int, j:int):
+    """prefix_cost between WORDFORMS[i] and WORDFORMS[j]."""
+    _build()
+    s1, s2 = SPELLINGS[i], SPELLINGS[j]
+    if s1.startswith(s2) or s2.startswith(s1):
+        return 2 + min(len(s1), len(s2))
+    return 0
+
+
+def similarity(i:int, j:int):
+    """similarity_cost between WORDFORMS[i] and WORDFORMS[j]."""
+    _build()
+    if _lcs_matrix is not None:
+        return (_lcs_matrix[i, j] / max(LENGTHS[i], LENGTHS[j])) ** 2
+    if i in _similarity_rows:
+        return _similarity_rows[i][j]
+    # one pair isn't worth computing (and keeping) a whole row.
+    return utils.similarity(SPELLINGS[i], SPELLINGS[j])
+
+
+def phonology_key():
+    """A hash of the constants that WORDFORMS is built from."""
+    phonology = repr((CACHE_VERSION, ONSETS, VOWELS, CODAS,
+                      ILLEGAL_SUBSTRINGS, ILLEGAL_JOINS,
+                      MEDIAL_ONSETS_REQUIRED))
+    return hashlib.sha256(phonology.encode()).hexdigest()[:16]
+
+
+def use_cache(directory:str=CACHE_DIR):
+    """Use the tables saved in directory, saving them there first if needed.
+
+    Return the path of the tables. With directory None, stop using them.
+    With more than MAX_CACHE_SIZE wordforms, the LCS matrix is left out,
+    and only the source cost matrices are saved there.
+    """
+    global _lcs_matrix, _cache_path
+    _build()
+    if directory is None:
+        _lcs_matrix = _cache_path = None
+        return None
+    path = os.path.join(directory, f'tables-{phonology_key()}')
+    if SIZE > MAX_CACHE_SIZE:
+        os.makedirs(path, exist_ok=True)
+        _lcs_matrix = None
+        _cache_path = path
+        return path
+    try:
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        up_to_date = (manifest['version'] == CACHE_VERSION and
+                      manifest['spellings'] == SPELLINGS)
+    except (OSError, ValueError, KeyError):
+        up_to_date = False
+    if not up_to_date:
+        build_cache(path)
+    _lcs_matrix = np.load(os.path.join(path, 'lcs.npy'), mmap_mode='r')
+    _cache_path = path
+    # rows computed so far are no longer needed.
+    _similarity_rows.clear()
+    return path
+
+
+def build_cache(path:str):
+    """Compute the tables and save them in the given directory.
+
+    Each file is written under a temporary name and then renamed,
+    so other processes never see a half-written file.
+    Raise a ValueError if there are more than MAX_CACHE_SIZE wordforms.
+    """
+    _build()
+    if SIZE > MAX_CACHE_SIZE:
+        raise ValueError(f"The LCS matrix for {SIZE} wordforms would take "
+                         f"{SIZE * SIZE / 1e9:.1f} GB.")
+    os.makedirs(path, exist_ok=True)
+    temporary = os.path.join(path, f'lcs.{os.getpid()}.tmp.npy')
+    lcs = np.lib.format.open_memmap(temporary, mode='w+', dtype=np.uint8,
+                                    shape=(SIZE, SIZE))
+    for i, s in enumerate(SPELLINGS):
+        lcs[i] = lcs_lengths(s)
+    lcs.flush()
+    del lcs
+    os.replace(temporary, os.path.join(path, 'lcs.npy'))
+    temporary = os.path.join(path, f'manifest.{os.getpid()}.tmp.json')
+    with open(temporary, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'spellings': SPELLINGS}, f)
+    os.replace(temporary, os.path.join(path, 'manifest.json'))
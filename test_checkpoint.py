@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import checkpoint
+from word import Word
+from vocabulary import Vocabulary
+from optimizer import Optimizer, Greedy, SimulatedAnnealing
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.words = [Word(s) for s in ['kala', 'telo', 'suno', 'mun', 'a',
+                                        'pona', 'ike', 'jan']]
+        self.importances = list(range(8, 0, -1))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'search.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def search(self, seed=0):
+        vocab = Vocabulary(self.words, self.importances, seed=seed)
+        return vocab, Optimizer(vocab, Greedy())
+
+    def test_resume(self):
+        # a resumed search carries on exactly as if it hadn't stopped.
+        vocab, optimizer = self.search()
+        optimizer.run(iterations=300, restore_best=False)
+        checkpoint.write(self.path, checkpoint.snapshot(vocab, optimizer))
+        optimizer.run(iterations=300, restore_best=False)
+
+        resumed, resumed_optimizer = self.search(seed=99)
+        checkpoint.resume(self.path, resumed, resumed_optimizer)
+        self.assertEqual(resumed_optimizer.iterations, 300)
+        resumed_optimizer.run(iterations=300, restore_best=False)
+        self.assertEqual(resumed.assignment(), vocab.assignment())
+        self.assertEqual(resumed.rng.getstate(), vocab.rng.getstate())
+        self.assertEqual(resumed_optimizer.iterations, 600)
+        self.assertEqual(resumed_optimizer.best_cost, optimizer.best_cost)
+        self.assertEqual(resumed_optimizer.best_assignment,
+                         optimizer.best_assignment)
+
+    def test_resume_budget(self):
+        # a search cut short finishes its total budget, and cools on
+        # from where it stopped rather than starting hot again.
+        vocab = Vocabulary(self.words, self.importances, seed=0)
+        optimizer = Optimizer(vocab, SimulatedAnnealing())
+        optimizer.run(iterations=400, restore_best=False, total=True)
+
+        cut = Vocabulary(self.words, self.importances, seed=0)
+        cut_optimizer = Optimizer(cut, SimulatedAnnealing())
+        def stop(stats):
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            cut_optimizer.run(iterations=400, callback=stop, report_every=150,
+                              total=True)
+        checkpoint.write(self.path, checkpoint.snapshot(cut, cut_optimizer))
+
+        resumed = Vocabulary(self.words, self.importances, seed=99)
+        resumed_optimizer = Optimizer(resumed, SimulatedAnnealing())
+        checkpoint.resume(self.path, resumed, resumed_optimizer)
+        resumed_optimizer.run(iterations=400, restore_best=False, total=True)
+        self.assertEqual(resumed_optimizer.iterations, 400)
+        self.assertEqual(resumed.assignment(), vocab.assignment())
+        # and once it is used up, there is nothing left to do.
+        resumed_optimizer.run(iterations=400, total=True)
+        self.assertEqual(resumed_optimizer.iterations, 400)
+
+    def test_wrong_vocabulary(self):
+        vocab, optimizer = self.search()
+        checkpoint.write(self.path, checkpoint.snapshot(vocab))
+        other = Vocabulary(self.words[1:], self.importances[1:])
+        self.assertRaises(ValueError, checkpoint.resume, self.path, other)
+        # the same number of words, but not the same sources.
+        renamed = [Word('kalan')] + self.words[1:]
+        other = Vocabulary(renamed, self.importances)
+        self.assertRaises(ValueError, checkpoint.resume, self.path, other)
+
+    def test_checkpointer(self):
+        # as a callback, it writes in the background every interval.
+        vocab, optimizer = self.search()
+        with checkpoint.Checkpointer(self.path, vocab, optimizer,
+                                     interval=0) as checkpointer:
+            optimizer.run(iterations=500, callback=checkpointer,
+                          report_every=100)
+        self.assertGreaterEqual(checkpointer.written, 1)
+        self.assertEqual([f for f in os.listdir(self.directory.name)],
+                         ['search.npz'])
+        state = checkpoint.read(self.path)
+        self.assertEqual(int(state['iterations']), 500)
+        self.assertEqual(list(state['assignment']), vocab.assignment())
+
+if __name__ == '__main__':
+    unittest.main()
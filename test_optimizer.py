@@ -0,0 +1,60 @@
+import unittest
+
+from word import Word
+from vocabulary import Vocabulary
+from optimizer import (Optimizer, Greedy, SimulatedAnnealing, Tabu,
+                       LateAcceptance, linear_cooling, exponential_cooling)
+
+class TestOptimizer(unittest.TestCase):
+    def make_vocab(self, seed=0):
+        return Vocabulary([Word('') for _ in range(20)], debug=True, seed=seed)
+
+    def test_strategies(self):
+        # every strategy should end with the best cost it saw.
+        strategies = [Greedy(),
+                      SimulatedAnnealing(),
+                      SimulatedAnnealing(linear_cooling(0.1, 0)),
+                      Tabu(tenure=10, neighborhood=5),
+                      LateAcceptance(length=20)]
+        for strategy in strategies:
+            vocab = self.make_vocab()
+            cost = vocab.total_cost
+            optimizer = Optimizer(vocab, strategy)
+            stats = optimizer.run(iterations=300)
+            self.assertEqual(stats['iterations'], 300)
+            self.assertLessEqual(stats['best_cost'], cost)
+            self.assertAlmostEqual(vocab.total_cost, stats['best_cost'])
+            self.assertAlmostEqual(vocab.cost(), stats['best_cost'])
+
+    def test_budgets(self):
+        # the search should stop when any budget is used up.
+        optimizer = Optimizer(self.make_vocab())
+        stats = optimizer.run(seconds=0.2)
+        self.assertGreaterEqual(stats['seconds'], 0.2)
+        self.assertGreater(stats['iterations_per_second'], 0)
+        optimizer = Optimizer(self.make_vocab())
+        stats = optimizer.run(plateau=50)
+        self.assertGreaterEqual(stats['iterations'], 50)
+
+    def test_callback(self):
+        # is the callback called every report_every iterations?
+        reports = []
+        optimizer = Optimizer(self.make_vocab())
+        optimizer.run(iterations=100, callback=reports.append,
+                      report_every=25)
+        self.assertEqual([r['iterations'] for r in reports], [25, 50, 75, 100])
+        for r in reports:
+            self.assertLessEqual(r['acceptance_rate'], 1)
+
+    def test_seed(self):
+        # the same seed should give the same search.
+        costs = []
+        for _ in range(2):
+            optimizer = Optimizer(self.make_vocab(seed=7),
+                                  SimulatedAnnealing(exponential_cooling(0.1, 0.001)))
+            costs.append(optimizer.run(iterations=200)['best_cost'])
+        self.assertEqual(costs[0], costs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from word import Word
+from vocabulary import Vocabulary
+from parallel import ParallelSearch
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.words = [Word(s) for s in ['kala', 'telo', 'suno', 'mun', 'a',
+                                        'pona', 'ike', 'jan', 'ma', 'tomo']]
+        self.importances = list(range(10, 0, -1))
+
+    def check_best(self, search):
+        # the reported best cost should be the cost of the best assignment.
+        cost, assignment = search.run(seconds=0.6, interval=0.2)
+        vocab = Vocabulary(self.words, self.importances, verbose=False)
+        self.assertLessEqual(cost, vocab.total_cost)
+        vocab.restore(assignment)
+        self.assertAlmostEqual(vocab.total_cost, cost)
+
+    def test_restarts(self):
+        with ParallelSearch(self.words, self.importances,
+                            replicas=2, seed=0) as search:
+            self.check_best(search)
+            self.assertEqual(len(search.stats), 2)
+
+    def test_tempering(self):
+        with ParallelSearch(self.words, self.importances,
+                            temperatures=[0.001, 0.01, 0.1], seed=0) as search:
+            self.check_best(search)
+            self.assertGreater(search.swap_attempts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from phonotactics import Phonotactics, PHONOTACTICS, DEAD
+from wordform import Wordform
+
+class TestPhonotactics(unittest.TestCase):
+    def test_accepts(self):
+        # legal toki pona words.
+        for word in ['a', 'kala', 'insa', 'kiwen', 'kijetesantakalu']:
+            self.assertTrue(Wordform(word).is_legal(), word)
+        # wuwojiti, nn, nm, and onsetless syllables mid-word.
+        for word in ['wuta', 'kajin', 'kinni', 'kinma', 'kai', 'tia']:
+            self.assertFalse(Wordform(word).is_legal(), word)
+        self.assertFalse(PHONOTACTICS.accepts([]))
+        self.assertFalse(PHONOTACTICS.accepts([('x', 'a', '')]))
+
+    def test_step(self):
+        # stepping one syllable at a time should agree with run().
+        syllables = [('k', 'i', ''), ('j', 'e', ''), ('', 'a', 'n')]
+        state = PHONOTACTICS.start
+        for syl in syllables:
+            state = PHONOTACTICS.step(state, syl)
+        self.assertEqual(state, DEAD)
+        self.assertEqual(PHONOTACTICS.run(syllables), DEAD)
+        self.assertNotEqual(PHONOTACTICS.run(syllables[:2]), DEAD)
+        self.assertEqual(PHONOTACTICS.step(DEAD, syllables[0]), DEAD)
+
+    def test_across_syllables(self):
+        # illegal substrings are caught across syllable boundaries too.
+        rules = Phonotactics(['', 'p', 't'], ['a', 'i'], ['', 'n'],
+                             illegal_substrings=['nt', 'aia'])
+        self.assertTrue(rules.accepts([('p', 'a', 'n'), ('p', 'i', '')]))
+        self.assertFalse(rules.accepts([('p', 'a', 'n'), ('t', 'i', '')]))
+        self.assertFalse(rules.accepts([('', 'a', ''), ('', 'i', ''),
+                                        ('', 'a', '')]))
+        # without the onset rule, onsetless syllables can go anywhere.
+        rules = Phonotactics(['', 'p'], ['a'], [''],
+                             medial_onsets_required=False)
+        self.assertTrue(rules.accepts([('p', 'a', ''), ('', 'a', '')]))
+
+
+if __name__ == '__main__':
+    unittest.main()
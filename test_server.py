@@ -0,0 +1,80 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from word import Word
+from vocabulary import Vocabulary
+from server import make_server
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        words = [Word(s) for s in ['kala', 'telo', 'suno', 'mun', 'a']]
+        self.vocab = Vocabulary(words, importances=[5, 4, 3, 2, 1])
+        self.server = make_server(self.vocab, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.url = f'http://{host}:{port}'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def post(self, path, body):
+        request = urllib.request.Request(self.url + path,
+                                         data=json.dumps(body).encode(),
+                                         method='POST')
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def test_suggest(self):
+        reply = self.post('/suggest', {'source': 'kalen', 'importance': 0.1,
+                                       'k': 3})
+        expected = self.vocab.suggest(Word('kalen'), 0.1, 3)
+        self.assertEqual([s['wordform'] for s in reply['suggestions']],
+                         [wf.spelling() for wf, _ in expected])
+        reply = self.post('/suggest', {'sources': {'kalen': 1, 'sin': 1},
+                                       'importance': 0.1})
+        self.assertEqual(len(reply['suggestions']), 10)
+
+    def test_concurrent(self):
+        # many requests at once all get the same answers as one at a time.
+        sources = ['kalen', 'sin', 'pona', 'telon', 'mi', 'wawa'] * 4
+        expected = {s: [wf.spelling() for wf, _ in
+                        self.vocab.suggest(Word(s), 0.05, 4)]
+                    for s in set(sources)}
+        def ask(source):
+            reply = self.post('/suggest', {'source': source,
+                                           'importance': 0.05, 'k': 4})
+            return source, [s['wordform'] for s in reply['suggestions']]
+        with ThreadPoolExecutor(8) as pool:
+            for source, suggestions in pool.map(ask, sources):
+                self.assertEqual(suggestions, expected[source])
+
+    def test_errors(self):
+        for path, body in [('/suggest', {'source': 'kalen'}),
+                           ('/suggest', {'source': 'kalen',
+                                         'importance': -1}),
+                           ('/suggest', {'source': 'kalen',
+                                         'importance': float('nan')}),
+                           ('/suggest', [1, 2]),
+                           ('/suggest', {'sources': ['a'], 'importance': 1}),
+                           ('/suggest', {'sources': {'a': 'b'},
+                                         'importance': 1}),
+                           ('/suggest', {'source': 5, 'importance': 1}),
+                           ('/other', {})]:
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.post(path, body)
+            self.assertEqual(context.exception.code,
+                             404 if path == '/other' else 400)
+            context.exception.close()
+        # the server is still answering.
+        self.assertEqual(len(self.post('/suggest', {'importance': 1})
+                             ['suggestions']), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
+import pickle
 import unittest
+from itertools import product
 
-from syllable import Syllable, SYLLABLES
+from constants import ONSETS, VOWELS, CODAS
+from syllable import Syllable, SYLLABLES, SYLLABLE_TABLE
 
 class TestSyllable(unittest.TestCase):
     def test_init(self):
@@ -73,6 +76,26 @@ class TestSyllable(unittest.TestCase):
         self.assertEqual(Syllable('kin').spelling(), 'kin')
         self.assertEqual(Syllable('nun').spelling(), 'nun')
 
+    def test_interned(self):
+        # there should be one Syllable per spelling.
+        self.assertIs(Syllable('kin'), Syllable('kin'))
+        self.assertIs(pickle.loads(pickle.dumps(Syllable('kin'))),
+                      Syllable('kin'))
+        self.assertFalse(hasattr(Syllable('kin'), '__dict__'))
+
+    def test_syllable_table(self):
+        # the table should hold exactly the strings that parse.
+        letters = sorted(set(''.join(ONSETS + VOWELS + CODAS)))
+        for length in range(1, 4):
+            for letters_ in product(letters, repeat=length):
+                syl = ''.join(letters_)
+                try:
+                    Syllable.parse(syl)
+                except ValueError:
+                    self.assertNotIn(syl, SYLLABLE_TABLE)
+                else:
+                    self.assertIs(SYLLABLE_TABLE[syl], Syllable(syl))
+
     def test_all_syllables(self):
         # should generate all legal syllables.
         # (10 onsets, 5 vowels, forbid wu wo ji ti, 2 codas)
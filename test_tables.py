@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import tables
+from word import Word
+from wordform import Wordform, WORDFORMS
+
+class TestTables(unittest.TestCase):
+    def test_index(self):
+        # does every wordform know its place in WORDFORMS?
+        for i in [0, 1, 91, 92, 500, len(WORDFORMS) - 1]:
+            self.assertEqual(WORDFORMS[i].index, i)
+        self.assertEqual(tables.index(Wordform('kala')), tables.INDEX['kala'])
+        self.assertRaises(ValueError, tables.index, Wordform('kijetesantakalu'))
+
+    def test_rows_match_methods(self):
+        # do the rows agree with the Wordform methods?
+        for i in [0, 7, 92, 1234, len(WORDFORMS) - 1]:
+            wf = WORDFORMS[i]
+            similarity = tables.similarity_row(i)
+            shape = tables.word_shape_row(i)
+            first_sound = tables.first_sound_row(i)
+            prefix = tables.prefix_row(i)
+            for j in range(0, len(WORDFORMS), 97):
+                other = WORDFORMS[j]
+                self.assertAlmostEqual(similarity[j],
+                                       wf.similarity_cost(other))
+                self.assertEqual(shape[j], wf.word_shape_cost(other))
+                self.assertEqual(first_sound[j], wf.first_sound_cost(other))
+                self.assertEqual(prefix[j], wf.prefix_cost(other))
+
+    def test_source_cost_row(self):
+        # does the row agree with Word.source_cost?
+        for source in ['', 'kalensi', 'tajm', 'a', 'semisalit']:
+            word = Word(source)
+            row = tables.source_cost_row(source)
+            for j in range(0, len(WORDFORMS), 89):
+                self.assertEqual(row[j], word.source_cost(WORDFORMS[j]))
+
+    def test_source_cost_matrix(self):
+        # each row is the source's row, and the cache loads the same matrix.
+        sources = ['kalensi', 'sitelen', '', 'o']
+        costs = tables.source_cost_matrix(sources)
+        self.assertEqual(costs.shape, (4, tables.SIZE))
+        self.assertEqual(costs.dtype, np.int8)
+        for source, row in zip(sources, costs):
+            np.testing.assert_array_equal(row, tables.source_cost_row(source))
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                path = tables.use_cache(directory)
+                np.testing.assert_array_equal(
+                    tables.source_cost_matrix(sources), costs)
+                saved = [f for f in os.listdir(path) if f.startswith('sources-')]
+                self.assertEqual(len(saved), 1)
+                np.testing.assert_array_equal(
+                    tables.source_cost_matrix(sources), costs)
+            finally:
+                tables.use_cache(None)
+
+    def test_prefix_row(self):
+        # prefixes in either direction should be found.
+        ka = tables.index(Wordform('ka'))
+        kala = tables.index(Wordform('kala'))
+        self.assertEqual(tables.prefix_row(ka)[kala], 2 + 2)
+        self.assertEqual(tables.prefix_row(kala)[ka], 2 + 2)
+
+    def test_prefix_partners(self):
+        # the partners are exactly the nonzero entries of the row.
+        for i in [0, 3, tables.index(Wordform('ka')), 5000]:
+            row = tables.prefix_row(i)
+            partners, costs = tables.prefix_partners(i)
+            self.assertEqual(sorted(partners), list(np.flatnonzero(row)))
+            np.testing.assert_array_equal(costs, row[partners])
+
+    def test_cache(self):
+        # the cached tables should agree with the computed ones.
+        expected = [tables.similarity_row(i).copy() for i in [0, 500, 6000]]
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                path = tables.use_cache(directory)
+                self.assertTrue(os.path.exists(os.path.join(path, 'lcs.npy')))
+                for i, row in zip([0, 500, 6000], expected):
+                    np.testing.assert_array_equal(tables.similarity_row(i), row)
+                    self.assertEqual(tables.similarity(i, 77), row[77])
+                # using it again should load, not rebuild.
+                modified = os.path.getmtime(os.path.join(path, 'lcs.npy'))
+                self.assertEqual(tables.use_cache(directory), path)
+                self.assertEqual(os.path.getmtime(os.path.join(path, 'lcs.npy')),
+                                 modified)
+            finally:
+                tables.use_cache(None)
+
+    def test_cache_limit(self):
+        # too large a universe saves no LCS matrix, but still works.
+        expected = tables.similarity_row(500).copy()
+        limit = tables.MAX_CACHE_SIZE
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                tables.MAX_CACHE_SIZE = tables.SIZE - 1
+                path = tables.use_cache(directory)
+                self.assertFalse(os.path.exists(os.path.join(path, 'lcs.npy')))
+                np.testing.assert_array_equal(tables.similarity_row(500),
+                                              expected)
+                with self.assertRaises(ValueError):
+                    tables.build_cache(path)
+                tables.source_cost_matrix(['kalensi'])
+                self.assertTrue(any(f.startswith('sources-')
+                                    for f in os.listdir(path)))
+            finally:
+                tables.MAX_CACHE_SIZE = limit
+                tables.use_cache(None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from trie import Trie
+
+class TestTrie(unittest.TestCase):
+    def setUp(self):
+        self.words = ['ka', 'kala', 'kalan', 'kalama', 'kule', 'a', 'ala']
+        self.trie = Trie((w, i) for i, w in enumerate(self.words))
+
+    def test_insert_remove(self):
+        self.assertEqual(len(self.trie), 7)
+        self.assertIn('kala', self.trie)
+        self.assertNotIn('kal', self.trie)
+        self.trie.remove('kala')
+        self.assertNotIn('kala', self.trie)
+        self.assertIn('kalan', self.trie)
+        self.assertEqual(len(self.trie), 6)
+        self.assertRaises(KeyError, self.trie.remove, 'kala')
+        self.assertRaises(KeyError, self.trie.remove, 'kal')
+        self.assertEqual(self.trie.get('kalan'), 2)
+        self.assertIsNone(self.trie.get('kala'))
+        self.assertEqual(self.trie.get('kal', 0), 0)
+        self.trie.remove('kalama')
+        self.trie.remove('kalan')
+        # the branch past 'ka' should be pruned away.
+        self.assertEqual(list(self.trie.root.children['k']
+                              .children['a'].children), [])
+
+    def test_ancestors_descendants(self):
+        self.assertEqual(sorted(s for s, _ in self.trie.ancestors('kalan')),
+                         ['ka', 'kala', 'kalan'])
+        self.assertEqual(sorted(s for s, _ in self.trie.descendants('kala')),
+                         ['kala', 'kalama', 'kalan'])
+        self.assertEqual(list(self.trie.descendants('x')), [])
+        self.assertEqual(list(self.trie.ancestors('x')), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
 import unittest
+from itertools import permutations
+
+import numpy as np
 
 from utils import *
 
@@ -65,6 +68,74 @@ class TestUtils(unittest.TestCase):
         self.assertAlmostEqual(similarity('a', 'musi'), 0)
 
 
+    def test_bit_parallel_matches_dynamic_program(self):
+        # the bit-parallel algorithms should agree with the usual tables.
+        def edit_distance_table(s1, s2):
+            previous = list(range(len(s2) + 1))
+            for i, c1 in enumerate(s1, 1):
+                current = [i]
+                for j, c2 in enumerate(s2, 1):
+                    current.append(min(previous[j] + 1, current[j-1] + 1,
+                                       previous[j-1] + (c1 != c2)))
+                previous = current
+            return previous[-1]
+        rng = np.random.default_rng(0)
+        words = [''.join(rng.choice(list('akn'), rng.integers(0, 9)))
+                 for _ in range(200)]
+        for s1, s2 in zip(words, words[1:]):
+            self.assertEqual(edit_distance(s1, s2),
+                             edit_distance_table(s1, s2))
+            self.assertEqual(longest_common_subsequence(s1, s2),
+                             longest_common_subsequence(s2, s1))
+        self.assertEqual(edit_distance('', 'abc'), 3)
+        self.assertEqual(edit_distance('abc', ''), 3)
+        self.assertEqual(longest_common_subsequence('', 'abc'), 0)
+
+    def test_string_batch(self):
+        # one source against many targets should match one at a time.
+        targets = ['', 'a', 'kala', 'kalama', 'sitelen', 'kepeken',
+                   'zyxwvutsrqp', 'abcdefghijk', 'x' * 64]
+        batch = StringBatch(targets)
+        for source in ['', 'a', 'kala', 'contemporary', 'xyabcfghixx']:
+            self.assertEqual(list(batch.edit_distances(source)),
+                             [edit_distance(t, source) for t in targets])
+            self.assertEqual(list(batch.lcs_lengths(source)),
+                             [longest_common_subsequence(t, source)
+                              for t in targets])
+        self.assertRaises(ValueError, StringBatch, ['x' * 65])
+
+    def test_soft_minimum(self):
+        costs = np.array([[3.0, 1.0, 2.0], [5.0, 1.0, 0.0]])
+        weights = [0.5, 0.5]
+        soft = soft_minimum(costs, weights, 1.0)
+        # between the minimum and the minimum plus -log(weight).
+        self.assertTrue(np.all(soft >= costs.min(axis=0)))
+        self.assertTrue(np.all(soft <= costs.min(axis=0) + np.log(2)))
+        # equal costs give that cost.
+        self.assertAlmostEqual(soft[1], 1.0)
+        np.testing.assert_array_equal(soft_minimum(costs, weights, 0),
+                                      [3.0, 1.0, 0.0])
+        # huge costs don't underflow.
+        self.assertAlmostEqual(
+            float(soft_minimum([1000.0, 1000.0], [0.5, 0.5], 0.01)), 1000.0)
+
+    def test_linear_assignment(self):
+        # does the assignment find the cheapest distinct columns?
+        costs = np.array([[4, 1, 3],
+                          [2, 0, 5],
+                          [3, 2, 2]])
+        self.assertEqual(linear_assignment(costs), [1, 0, 2])
+        # compare with brute force on small random problems.
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            costs = rng.integers(0, 10, (3, 5)).astype(float)
+            choices = linear_assignment(costs)
+            self.assertEqual(len(set(choices)), 3)
+            best = min(sum(costs[i, p[i]] for i in range(3))
+                       for p in permutations(range(5), 3))
+            self.assertEqual(sum(costs[i, choices[i]] for i in range(3)),
+                             best)
+        self.assertRaises(ValueError, linear_assignment, np.zeros((3, 2)))
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
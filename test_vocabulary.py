@@ -1,7 +1,14 @@
 import unittest
+import warnings
+from itertools import combinations
 
+import numpy as np
+
+import tables
 from word import Word
+from wordform import Wordform, WORDFORMS
 from vocabulary import Vocabulary
+from optimizer import Optimizer, SimulatedAnnealing
 
 class TestVocabulary(unittest.TestCase):
     def test_init_from_words(self):
@@ -13,6 +20,32 @@ class TestVocabulary(unittest.TestCase):
         vocab = Vocabulary([Word('') for _ in range(100)])
         self.assertEqual(len(vocab.wordforms), 100)
 
+    def test_set_favorites(self):
+        # the optimal favorites should have the lowest total solo cost.
+        words = [Word(s) for s in ['kala', 'kalan', 'kal', 'ka', 'a', 'an']]
+        totals = {}
+        for method in ['optimal', 'greedy']:
+            vocab = Vocabulary(words, importances=[1, 2, 3, 4, 5, 6],
+                               favorites=method)
+            self.assertEqual(len(vocab.owners), len(words))
+            totals[method] = sum(vocab.solo_cost(w, wf)
+                                 for w, wf in vocab.wordforms.items())
+        self.assertLessEqual(totals['optimal'], totals['greedy'])
+        self.assertRaises(ValueError, Vocabulary, words, favorites='best')
+        # there have to be enough wordforms to go round.
+        too_many = [Word('') for _ in range(tables.SIZE + 1)]
+        for method in ['optimal', 'greedy']:
+            self.assertRaises(ValueError, Vocabulary, too_many,
+                              favorites=method)
+        # on a live vocabulary, the running total follows the new wordforms.
+        vocab = Vocabulary(words, importances=[1, 2, 3, 4, 5, 6], seed=2,
+                           debug=True)
+        for _ in range(20):
+            vocab.alter_if_better()
+        vocab.set_favorites('greedy')
+        self.assertAlmostEqual(vocab.total_cost, vocab.cost())
+        vocab.alter_if_better()
+
     def test_cost(self):
         # cost should be greater than 0.
         vocab = Vocabulary([Word('') for _ in range(100)])
@@ -26,6 +59,283 @@ class TestVocabulary(unittest.TestCase):
             vocab.alter_if_better()
             self.assertLessEqual(vocab.cost(), cost)
 
+    def test_cost_delta(self):
+        # does the delta agree with the change in the full cost?
+        vocab = Vocabulary([Word('kala'), Word('telo'), Word('suno'),
+                            Word('mun'), Word('a')],
+                           importances=[5, 4, 3, 2, 1])
+        word = vocab.words[2]
+        new_wf = Wordform('kalan')
+        old_cost = vocab.cost()
+        delta = vocab.cost_delta(word, new_wf)
+        vocab.assign(word, new_wf)
+        self.assertAlmostEqual(vocab.cost() - old_cost, delta)
+
+    def test_move_delta(self):
+        # do swaps, rotations, and other moves agree with the full cost?
+        vocab = Vocabulary([Word(s) for s in ['kala', 'ka', 'telo', 'suno',
+                                              'mun', 'a', 'kalan']],
+                           importances=[7, 6, 5, 4, 3, 2, 1], debug=True)
+        moves = [vocab.random_swap,
+                 vocab.random_rotation,
+                 lambda: vocab.random_rotation(5),
+                 lambda: {vocab.words[0]: Wordform('pu'),
+                          vocab.words[1]: Wordform('sinpin')},
+                 lambda: {vocab.words[3]: vocab.wordforms[vocab.words[4]],
+                          vocab.words[4]: Wordform('wawa')}]
+        for propose in moves:
+            move = propose()
+            cost = vocab.cost()
+            delta = vocab.move_delta(move)
+            vocab.make_move(move, delta)
+            self.assertAlmostEqual(vocab.cost() - cost, delta)
+
+    def test_large_mode(self):
+        # computing similarities a block at a time shouldn't change anything.
+        words = [Word(s) for s in ['kala', 'ka', 'telo', 'suno', 'mun', 'a',
+                                   'kalan', 'sina', 'pona', 'lili']]
+        importances = list(range(10, 0, -1))
+        # a large vocabulary starts from the greedy favorites.
+        dense = Vocabulary(words, importances, seed=3, favorites='greedy')
+        large = Vocabulary(words, importances, seed=3, debug=True,
+                           memory_limit=2000)
+        self.assertEqual(large.assignment(), dense.assignment())
+        self.assertIsNone(large.pair_rows)
+        self.assertEqual(large.error_bound, 0)
+        self.assertAlmostEqual(large.cost(), dense.cost())
+        for _ in range(20):
+            change = dense.random_move()
+            for move in [dense.random_swap(), dense.random_rotation(),
+                         dict([change]) if change else {}]:
+                if not move:
+                    continue
+                self.assertAlmostEqual(large.move_delta(move),
+                                       dense.move_delta(move))
+                large.make_move(move, large.move_delta(move))
+                dense.make_move(move, dense.move_delta(move))
+        np.testing.assert_allclose(large.candidate_costs(words[2]),
+                                   dense.candidate_costs(words[2]))
+
+    def test_pair_threshold(self):
+        # leaving out unimportant pairs costs at most error_bound.
+        words = [Word(s) for s in ['kala', 'ka', 'telo', 'suno', 'mun', 'a',
+                                   'kalan', 'sina', 'pona', 'lili']]
+        importances = [2 ** -k for k in range(10)]
+        exact = Vocabulary(words, importances, seed=5, favorites='greedy')
+        pruned = Vocabulary(words, importances, seed=5, debug=True,
+                            memory_limit=10 ** 6, pair_threshold=1e-3)
+        self.assertLess(pruned.partners[-1], 10)
+        self.assertGreater(pruned.error_bound, 0)
+        for _ in range(30):
+            move = pruned.random_swap()
+            pruned.make_move(move, pruned.move_delta(move))
+            exact.make_move(move, exact.move_delta(move))
+            self.assertLessEqual(pruned.cost(), exact.cost() + 1e-12)
+            self.assertLessEqual(exact.cost(),
+                                 pruned.cost() + pruned.error_bound + 1e-12)
+        self.assertRaises(ValueError, Vocabulary, words, pair_threshold=0.1)
+        # a word may have importance 0, without any warnings.
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            vocab = Vocabulary(words, [1] * 9 + [0])
+        self.assertEqual(list(vocab.partners), [10] * 10)
+        self.assertEqual(vocab.error_bound, 0)
+
+    def test_owners(self):
+        # does the occupancy index follow every kind of move?
+        vocab = Vocabulary([Word('') for _ in range(10)], seed=1)
+        for _ in range(50):
+            for propose in [vocab.random_swap, vocab.random_rotation]:
+                move = propose()
+                vocab.make_move(move, vocab.move_delta(move))
+            vocab.alter_if_better()
+            vocab.best_response(vocab.words[3])
+            self.assertEqual(len(vocab.owners), 10)
+            self.assertEqual(vocab.taken.sum(), 10)
+            for w, wf in vocab.wordforms.items():
+                self.assertIs(vocab.owner(wf), w)
+                self.assertTrue(vocab.taken[wf.index])
+        free = next(wf for wf in WORDFORMS if not vocab.taken[wf.index])
+        self.assertIsNone(vocab.owner(free))
+
+    def test_source_cost(self):
+        # does the vocabulary's table agree with Word.source_cost?
+        words = [Word('kalensi'), Word('sitelen'), Word('o')]
+        vocab = Vocabulary(words)
+        for w in words:
+            for wf in [Wordform('kalen'), Wordform('sile'), Wordform('o')]:
+                self.assertEqual(vocab.source_cost(w, wf), w.source_cost(wf))
+
+    def test_multi_source_cost(self):
+        # several sources are combined into one row per word.
+        words = [Word(sources={'kalensi': 2, 'moneta': 1}), Word('sitelen')]
+        vocab = Vocabulary(words)
+        for w in words:
+            for wf in [Wordform('kalen'), Wordform('mone'), Wordform('o')]:
+                self.assertAlmostEqual(vocab.source_cost(w, wf),
+                                       w.source_cost(wf), places=5)
+
+    def test_buckets(self):
+        # do the buckets agree with summing the indicators over pairs,
+        # after some changes and swaps?
+        vocab = Vocabulary([Word('kala'), Word('kalama'), Word('ka'),
+                            Word('alasa'), Word('o'), Word('pona')],
+                           importances=[6, 5, 4, 3, 2, 1], seed=2, debug=True)
+        for _ in range(50):
+            move = vocab.random_move()
+            if move is not None:
+                vocab.make_move(dict([move]), vocab.move_delta(dict([move])))
+            swap = vocab.random_swap()
+            vocab.make_move(swap, vocab.move_delta(swap))
+        expected = 0
+        for w1, w2 in combinations(vocab.words, 2):
+            wf1, wf2 = vocab.wordforms[w1], vocab.wordforms[w2]
+            importance = 2 * vocab.importances[w1] * vocab.importances[w2]
+            expected += importance * (2.5 * (wf1.shape() == wf2.shape()) +
+                                      2.5 * (wf1.first_sound() ==
+                                             wf2.first_sound()))
+        self.assertAlmostEqual(vocab.bucket_cost(), expected)
+
+    def test_prefix_trie(self):
+        # the trie finds the same prefix costs as checking every pair,
+        # and keeps up with changes.
+        words = [Word('ka'), Word('kala'), Word('kalama'), Word('o'),
+                 Word('ona'), Word('sina')]
+        vocab = Vocabulary(words, seed=4, debug=True)
+        for _ in range(30):
+            for w, wf in [(words[0], Wordform('ka')),
+                          (words[1], Wordform('kala'))]:
+                if vocab.owner(wf) is None:
+                    vocab.change(w, wf, vocab.cost_delta(w, wf))
+            swap = vocab.random_swap()
+            vocab.make_move(swap, vocab.move_delta(swap))
+            for j in [0, tables.index(Wordform('kalan'))]:
+                expected = sum(tables.prefix_cost(j, k) for k in vocab.indices)
+                self.assertEqual(vocab.prefix_partner_cost(j), expected)
+        self.assertEqual(len(vocab.prefix_trie), len(words))
+
+    def pairwise_cost(self, vocab):
+        # cost() the slow way, summing over every word and pair of words.
+        cost = 0
+        for w, wf in vocab.wordforms.items():
+            cost += (wf.inherent_cost() + w.source_cost(wf)) * vocab.importances[w]
+        for w1, w2 in combinations(vocab.wordforms, 2):
+            wf1, wf2 = vocab.wordforms[w1], vocab.wordforms[w2]
+            importance = vocab.importances[w1] * vocab.importances[w2] * 2
+            cost += wf1.similarity_cost(wf2) * importance * 10.0
+            cost += wf1.word_shape_cost(wf2) * importance * 2.5
+            cost += wf1.first_sound_cost(wf2) * importance * 2.5
+            cost += wf1.prefix_cost(wf2) * 1.0
+        return cost
+
+    def test_cost_matches_pairs(self):
+        # does the matrix reduction agree with summing over pairs?
+        vocab = Vocabulary([Word('kala'), Word('kalama'), Word('ka'),
+                            Word('alasa'), Word('o')],
+                           importances=[5, 4, 3, 2, 1])
+        self.assertAlmostEqual(vocab.cost(), self.pairwise_cost(vocab))
+
+    def test_pinned(self):
+        # pinned words keep their wordforms (even ones not in WORDFORMS),
+        # and still count towards the cost.
+        words = [Word(s) for s in ['kala', 'kalama', 'ka', 'alasa', 'o',
+                                   'sina', 'kalan', 'la']]
+        pinned = {words[0]: Wordform('kala'), words[1]: Wordform('kalama'),
+                  words[4]: Wordform('o')}
+        for favorites in ['optimal', 'greedy']:
+            vocab = Vocabulary(words, importances=range(8, 0, -1), seed=6,
+                               debug=True, pinned=pinned, favorites=favorites)
+            self.assertEqual(len(vocab.words), 5)
+            self.assertAlmostEqual(vocab.cost(), self.pairwise_cost(vocab))
+            for _ in range(100):
+                vocab.alter_if_better()
+                move = vocab.random_rotation()
+                vocab.make_move(move, vocab.move_delta(move))
+            vocab.descend()
+            for w, wf in pinned.items():
+                self.assertIs(vocab.wordforms[w], wf)
+                self.assertIs(vocab.owner(wf), w)
+            for w in vocab.words:
+                self.assertNotIn(vocab.wordforms[w], pinned.values())
+            self.assertAlmostEqual(vocab.cost(), self.pairwise_cost(vocab))
+            # the listing shows every word, pinned ones too.
+            listing = str(vocab).split('IMPORTANCE\n')[1].splitlines()
+            self.assertEqual(len(listing), len(words))
+            self.assertTrue(listing[1].endswith('-> kalama'))
+        self.assertRaises(ValueError, Vocabulary, words[1:], pinned=pinned)
+        # with every word pinned, there is nothing to change.
+        for memory_limit in [None, 10**6]:
+            vocab = Vocabulary(words[:2], importances=[2, 1],
+                               memory_limit=memory_limit,
+                               pinned={w: pinned[w] for w in words[:2]})
+            self.assertEqual(vocab.words, [])
+            self.assertAlmostEqual(vocab.cost(), self.pairwise_cost(vocab))
+            vocab.alter_if_better()
+            stats = Optimizer(vocab, SimulatedAnnealing()).run(iterations=10)
+            self.assertEqual(stats['iterations'], 10)
+            self.assertAlmostEqual(vocab.cost(), self.pairwise_cost(vocab))
+
+    def test_suggest(self):
+        # each suggestion's delta is the new word's cost with everything.
+        words = [Word(s) for s in ['kala', 'kalama', 'telo', 'o', 'sina']]
+        vocab = Vocabulary(words, importances=[5, 4, 3, 2, 1],
+                           pinned={words[1]: Wordform('kalama')})
+        before = vocab.cost()
+        new = Word(sources={'kalen': 2, 'telon': 1})
+        suggestions = vocab.suggest(new, 0.1, k=5)
+        self.assertEqual(len(suggestions), 5)
+        self.assertEqual(vocab.cost(), before)
+        deltas = [delta for _, delta in suggestions]
+        self.assertEqual(deltas, sorted(deltas))
+        for wf, delta in suggestions:
+            self.assertIsNone(vocab.owner(wf))
+            expected = (wf.inherent_cost() + new.source_cost(wf)) * 0.1
+            for w, other in vocab.wordforms.items():
+                importance = 2 * 0.1 * vocab.importances[w]
+                expected += importance * (wf.similarity_cost(other) * 10.0 +
+                                          wf.word_shape_cost(other) * 2.5 +
+                                          wf.first_sound_cost(other) * 2.5)
+                expected += wf.prefix_cost(other) * 1.0
+            self.assertAlmostEqual(delta, expected)
+        # nothing else is cheaper.
+        costs = [delta for wf, delta in vocab.suggest(new, 0.1, k=10000)]
+        self.assertEqual(costs[:5], deltas)
+        for importance in [0.0, -1.0, float('nan')]:
+            self.assertRaises(ValueError, vocab.suggest, new, importance)
+
+    def test_running_cost(self):
+        # does the running total keep up with the full cost?
+        vocab = Vocabulary([Word('') for _ in range(20)], debug=True)
+        for _ in range(200):
+            vocab.alter_if_better()
+        self.assertAlmostEqual(vocab.total_cost, vocab.cost())
+
+
+    def test_candidate_costs(self):
+        # do the candidate costs agree with the cost delta?
+        vocab = Vocabulary([Word('kala'), Word('telo'), Word('suno'),
+                            Word('mun'), Word('a')],
+                           importances=[5, 4, 3, 2, 1])
+        word = vocab.words[1]
+        costs = vocab.candidate_costs(word)
+        old = vocab.wordforms[word]
+        for spelling in ['kalan', 'pu', 'esun', 'wawa']:
+            new = Wordform(spelling)
+            self.assertAlmostEqual(costs[tables.index(new)] -
+                                   costs[tables.index(old)],
+                                   vocab.cost_delta(word, new))
+        # wordforms of other words are not candidates.
+        self.assertEqual(costs[vocab.wordforms[vocab.words[0]].index],
+                         float('inf'))
+
+    def test_descend(self):
+        # after descending, no word should be able to improve alone.
+        vocab = Vocabulary([Word('') for _ in range(30)], debug=True)
+        cost = vocab.cost()
+        vocab.descend()
+        self.assertLess(vocab.cost(), cost)
+        for w in vocab.words:
+            self.assertEqual(vocab.best_response(w), 0)
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
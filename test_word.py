@@ -17,8 +17,29 @@ class TestWord(unittest.TestCase):
         self.assertLess(w.source_cost(Wordform('kalen')),
                         w.source_cost(Wordform('kiwen')))
 
+    def test_sources(self):
+        w = Word(sources={'kalensi': 3, 'moneta': 1})
+        self.assertEqual(w.sources, (('kalensi', 0.75), ('moneta', 0.25)))
+        self.assertEqual(w.source, 'kalensi')
+        self.assertEqual(Word('kala').sources, (('kala', 1.0),))
+        self.assertRaises(ValueError, Word, sources={'kala': 0})
+        self.assertRaises(ValueError, Word, sources={})
+
+    def test_multi_source_cost(self):
+        # a wordform close to either source is cheap.
+        w = Word(sources={'kalensi': 1, 'moneta': 1})
+        for wf in [Wordform('kalensi'), Wordform('moneta')]:
+            self.assertLess(w.source_cost(wf), w.source_cost(Wordform('jo')))
+        # it's never cheaper than the closest source alone.
+        wf = Wordform('monsi')
+        self.assertGreaterEqual(w.source_cost(wf),
+                                min(Word('kalensi').source_cost(wf),
+                                    Word('moneta').source_cost(wf)))
+
     def test_repr(self):
         self.assertEqual(str(Word('kalensi')), "Word('kalensi')")
+        self.assertEqual(repr(Word(sources={'a': 1, 'o': 1})),
+                         "Word(sources={'a': 0.5, 'o': 0.5})")
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+class TestWordMaker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.words = self.path('words.txt')
+        with open(self.words, 'w') as f:
+            f.write("# a small word list\n"
+                    "kala\ntelo\nsuno\n\nmun\n-\nkalensi:2 moneta:1\n")
+        self.importances = self.path('importances.txt')
+        with open(self.importances, 'w') as f:
+            f.write("6\n5\n4\n3\n2\n1\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def run_maker(self, *args):
+        return subprocess.run(
+            [sys.executable, 'word-maker.py', '--no-cache',
+             '--words', self.words, '--importances', self.importances,
+             *args],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    def test_run(self):
+        # progress is JSON lines, and the output has every word.
+        output = self.path('out.json')
+        result = self.run_maker('--iterations', '2000', '--seed', '3',
+                                '--progress', '0', '--output', output)
+        lines = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertEqual([l['iterations'] for l in lines],
+                         [1000, 2000, 2000])
+        self.assertTrue(lines[-1]['done'])
+        with open(output) as f:
+            vocabulary = json.load(f)
+        self.assertEqual(len(vocabulary['words']), 6)
+        self.assertEqual(vocabulary['words'][5]['sources'],
+                         {'kalensi': 2/3, 'moneta': 1/3})
+        self.assertAlmostEqual(vocabulary['cost'], lines[-1]['best_cost'])
+        # the same seed gives the same vocabulary.
+        again = self.path('again.json')
+        self.run_maker('--iterations', '2000', '--seed', '3', '--quiet',
+                       '--output', again)
+        with open(again) as f:
+            self.assertEqual(json.load(f)['words'], vocabulary['words'])
+
+    def test_checkpoint(self):
+        # a second run resumes from the first one's checkpoint.
+        saved = self.path('search.npz')
+        self.run_maker('--iterations', '1000', '--seed', '1', '--quiet',
+                       '--checkpoint', saved)
+        self.assertTrue(os.path.exists(saved))
+        # the budget is a total, so only the rest of it is spent.
+        result = self.run_maker('--iterations', '1500', '--seed', '1',
+                                '--progress', '1000', '--checkpoint', saved)
+        done = json.loads(result.stdout.splitlines()[-1])
+        self.assertEqual(done['iterations'], 1500)
+        result = self.run_maker('--iterations', '1500', '--seed', '1',
+                                '--progress', '1000', '--checkpoint', saved)
+        done = json.loads(result.stdout.splitlines()[-1])
+        self.assertEqual(done['iterations'], 1500)
+
+    def test_bad_importances(self):
+        with open(self.importances, 'a') as f:
+            f.write("1\n")
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            self.run_maker('--iterations', '10')
+        self.assertIn('7 importances for 6 words', context.exception.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
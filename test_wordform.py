@@ -1,7 +1,12 @@
+import pickle
+import random
+import subprocess
+import sys
 import unittest
 
 from syllable import Syllable
-from wordform import Wordform, WORDFORMS_1SYL, WORDFORMS_2SYL, WORDFORMS
+from wordform import (Wordform, WordformSpace,
+                      WORDFORMS_1SYL, WORDFORMS_2SYL, WORDFORMS)
 
 class TestWord(unittest.TestCase):
     def test_init_parse_1syl(self):
@@ -77,6 +82,15 @@ class TestWord(unittest.TestCase):
         self.assertRaises(ValueError, Wordform, 'ik')
         self.assertRaises(ValueError, Wordform, 'kln')
 
+    def test_parse(self):
+        # parse gives a fresh list of the shared Syllables.
+        syllables = Wordform.parse('kiwen')
+        self.assertEqual(syllables, [Syllable('ki'), Syllable('wen')])
+        syllables.append(Syllable('a'))
+        self.assertEqual(len(Wordform.parse('kiwen')), 2)
+        # slightly illegal words are still accepted.
+        self.assertEqual(Wordform.parse('wuta'), [Syllable('wu'), Syllable('ta')])
+
     def test_init_syllables(self):
         # does init accept a list of Syllables?
         wordform = Wordform(syllables=[Syllable('a')])
@@ -193,11 +207,60 @@ class TestWord(unittest.TestCase):
         self.assertLess(Wordform('ma'), Wordform('ni'))
         self.assertLess(Wordform('ni'), Wordform('wawa'))
 
+    def test_interned(self):
+        # there should be one Wordform per spelling.
+        self.assertIs(Wordform('kala'), Wordform('kala'))
+        self.assertIs(Wordform('kala'),
+                      Wordform(syllables=[Syllable('ka'), Syllable('la')]))
+        self.assertIs(Wordform('kala'), WORDFORMS[Wordform('kala').index])
+        self.assertIs(pickle.loads(pickle.dumps(Wordform('kala'))),
+                      Wordform('kala'))
+        self.assertFalse(hasattr(Wordform('kala'), '__dict__'))
+        self.assertEqual(Wordform('kala').length, 4)
+
+    def test_wordform_space(self):
+        # the spaces should agree with the lists.
+        self.assertEqual(list(WordformSpace(1)), WORDFORMS_1SYL)
+        self.assertEqual(list(WordformSpace(2)), WORDFORMS_2SYL)
+        space = WordformSpace(3)
+        self.assertEqual(len(space), 92 * 72 * 72)
+        # indexing, index(), and iteration should agree.
+        for i, wf in enumerate(space):
+            if i % 4999 == 0:
+                self.assertIs(space[i], wf)
+                self.assertEqual(space.index(wf), i)
+        self.assertEqual(i, len(space) - 1)
+        self.assertEqual(str(space[0]), 'ipipi')
+        self.assertIs(space[-1], space[len(space) - 1])
+        self.assertRaises(IndexError, space.__getitem__, len(space))
+        self.assertRaises(ValueError, space.index, Wordform('kala'))
+        self.assertRaises(ValueError, space.index, Wordform('kalanma'))
+        self.assertRaises(ValueError, WordformSpace, 0)
+
+    def test_wordform_space_sample(self):
+        # samples should be legal, and reproducible with the same seed.
+        space = WordformSpace(6)
+        samples = [space.sample(random.Random(seed)) for seed in range(20)]
+        for wf in samples:
+            self.assertEqual(len(wf.syllables), 6)
+            self.assertEqual(space[space.index(wf)], wf)
+        self.assertEqual(samples[3], space.sample(random.Random(3)))
+
     def test_all_wordforms(self):
         # certain properties that the WORDFORM list constants should have.
         self.assertEqual(len(WORDFORMS_1SYL), 92)
         self.assertEqual(len(WORDFORMS_2SYL), 6624)
         self.assertEqual(len(WORDFORMS), 92 + 6624)
 
+    def test_lazy_inventories(self):
+        # importing vocabulary builds nothing until it is used.
+        code = ('import vocabulary, wordform, tables\n'
+                'assert "WORDFORMS" not in vars(wordform)\n'
+                'assert "SIZE" not in vars(tables)\n'
+                'assert "SHAPES" not in vars(vocabulary)\n'
+                'assert tables.WORDFORMS is wordform.WORDFORMS\n'
+                'assert wordform.WORDFORMS[5].index == 5\n')
+        subprocess.run([sys.executable, '-c', code], check=True)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
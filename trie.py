@@ -0,0 +1,101 @@
+class _Node:
+    """One node of a Trie: the strings that start with a certain prefix."""
+
+    __slots__ = ('children', 'value', 'has_value')
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+        self.has_value = False
+
+
+class Trie:
+    """A prefix tree of strings, each with a value."""
+
+    def __init__(self, items=()):
+        """Create a trie of the given (string, value) pairs."""
+        self.root = _Node()
+        self.size = 0
+        for s, value in items:
+            self.insert(s, value)
+
+    def insert(self, s:str, value=None):
+        """Store s with the given value, replacing any old value."""
+        node = self.root
+        for c in s:
+            node = node.children.setdefault(c, _Node())
+        if not node.has_value:
+            self.size += 1
+        node.value, node.has_value = value, True
+
+    def remove(self, s:str):
+        """Forget s. If s isn't stored, raise a KeyError."""
+        path = [self.root]
+        for c in s:
+            if c not in path[-1].children:
+                raise KeyError(s)
+            path.append(path[-1].children[c])
+        if not path[-1].has_value:
+            raise KeyError(s)
+        path[-1].value, path[-1].has_value = None, False
+        self.size -= 1
+        # prune nodes that no longer lead anywhere.
+        for depth in range(len(s), 0, -1):
+            node = path[depth]
+            if node.children or node.has_value:
+                break
+            del path[depth - 1].children[s[depth - 1]]
+
+    def __contains__(self, s:str):
+        node = self._find(s)
+        return node is not None and node.has_value
+
+    def __len__(self):
+        return self.size
+
+    def get(self, s:str, default=None):
+        """The value stored with s, or default if s isn't stored."""
+        node = self._find(s)
+        if node is None or not node.has_value:
+            return default
+        return node.value
+
+    def _find(self, s:str):
+        """The node for prefix s, or None."""
+        node = self.root
+        for c in s:
+            node = node.children.get(c)
+            if node is None:
+                return None
+        return node
+
+    def ancestors(self, s:str):
+        """(string, value) for every stored string that is a prefix of s.
+
+        This includes s itself, if it is stored.
+        """
+        node = self.root
+        for depth in range(len(s) + 1):
+            if node.has_value:
+                yield s[:depth], node.value
+            if depth == len(s):
+                break
+            node = node.children.get(s[depth])
+            if node is None:
+                break
+
+    def descendants(self, s:str):
+        """(string, value) for every stored string that s is a prefix of.
+
+        This includes s itself, if it is stored.
+        """
+        node = self._find(s)
+        if node is None:
+            return
+        stack = [(s, node)]
+        while stack:
+            prefix, node = stack.pop()
+            if node.has_value:
+                yield prefix, node.value
+            for c, child in node.children.items():
+                stack.append((prefix + c, child))
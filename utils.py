@@ -1,36 +1,124 @@
+import numpy as np
+
+def match_masks(s):
+    """For each letter in s, a bitmask of the positions where it appears."""
+    masks = {}
+    for i, c in enumerate(s):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
 def edit_distance(s1, s2):
-    """The Levenshtein distance between two strings."""
-    # code generated by Github Copilot
-    m, n = len(s1), len(s2)
-    dp = [[0] * (n + 1) for _ in range(m + 1)]
-    for i in range(m + 1):
-        dp[i][0] = i
-    for j in range(n + 1):
-        dp[0][j] = j
-    for i in range(1, m + 1):
-        for j in range(1, n + 1):
-            if s1[i - 1] == s2[j - 1]:
-                dp[i][j] = dp[i - 1][j - 1]
-            else:
-                dp[i][j] = 1 + min(dp[i - 1][j],
-                                   dp[i][j - 1],
-                                   dp[i - 1][j - 1])
-    return dp[m][n]
+    """The Levenshtein distance between two strings.
+
+    This is Myers' bit-parallel algorithm, as formulated by Hyyro:
+    one column of the usual dynamic program is kept as bit vectors
+    of its vertical differences, and updated for a whole letter of s2
+    at once with a handful of integer operations.
+    """
+    m = len(s1)
+    if m == 0:
+        return len(s2)
+    masks = match_masks(s1)
+    all_bits = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    # vertical differences: positive and negative.
+    pv, mv = all_bits, 0
+    score = m
+    for c in s2:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        # horizontal differences: positive and negative.
+        ph = mv | (~(xh | pv) & all_bits)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = ((ph << 1) | 1) & all_bits
+        mh = (mh << 1) & all_bits
+        pv = mh | (~(xv | ph) & all_bits)
+        mv = ph & xv
+    return score
 
 def longest_common_subsequence(s1, s2):
-    """Length of the longest common subsequence between two strings."""
-    if len(s1) < len(s2):
-        return longest_common_subsequence(s2, s1)
-    previous_row = [0] * (len(s2) + 1)
-    for c1 in s1:
-        current_row = [0]
-        for j, c2 in enumerate(s2):
-            if c1 == c2:
-                current_row.append(previous_row[j] + 1)
-            else:
-                current_row.append(max(current_row[-1], previous_row[j + 1]))
-        previous_row = current_row
-    return previous_row[-1]
+    """Length of the longest common subsequence between two strings.
+
+    This is the bit-parallel algorithm of Allison and Dix (as in Hyyro):
+    a bit vector over the letters of s1 marks where the row of the usual
+    dynamic program does *not* increase, updated once per letter of s2.
+    """
+    masks = match_masks(s1)
+    all_bits = (1 << len(s1)) - 1
+    v = all_bits
+    for c in s2:
+        u = v & masks.get(c, 0)
+        v = ((v + u) | (v - u)) & all_bits
+    return len(s1) - bin(v).count('1')
+
+class StringBatch:
+    """Many target strings, to be compared with one source at a time.
+
+    The bit-parallel algorithms of edit_distance() and
+    longest_common_subsequence() run on all the targets at once:
+    each target's bit vector is one entry of a NumPy uint64 array.
+    So targets can be at most 64 letters long.
+    """
+
+    def __init__(self, targets:list):
+        self.lengths = np.array([len(t) for t in targets], dtype=np.int64)
+        if len(targets) and self.lengths.max() > 64:
+            raise ValueError("Targets can be at most 64 letters long.")
+        self.size = len(targets)
+        self.all_bits = np.array([(1 << len(t)) - 1 for t in targets],
+                                 dtype=np.uint64)
+        self.high_bit = np.array([(1 << len(t)) >> 1 for t in targets],
+                                 dtype=np.uint64)
+        # for each letter, the match_masks() of every target.
+        self.masks = {}
+        for i, t in enumerate(targets):
+            for c, mask in match_masks(t).items():
+                if c not in self.masks:
+                    self.masks[c] = np.zeros(self.size, dtype=np.uint64)
+                self.masks[c][i] = mask
+        self.no_match = np.zeros(self.size, dtype=np.uint64)
+
+    def edit_distances(self, source:str):
+        """edit_distance(target, source) for every target, as an array."""
+        one = np.uint64(1)
+        all_bits, high_bit = self.all_bits, self.high_bit
+        pv, mv = all_bits.copy(), np.zeros(self.size, dtype=np.uint64)
+        score = self.lengths.copy()
+        for c in source:
+            eq = self.masks.get(c, self.no_match)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | (~(xh | pv) & all_bits)
+            mh = pv & xh
+            score += (ph & high_bit) != 0
+            score -= (mh & high_bit) != 0
+            ph = ((ph << one) | one) & all_bits
+            mh = (mh << one) & all_bits
+            pv = mh | (~(xv | ph) & all_bits)
+            mv = ph & xv
+        # empty targets have no bits to keep score with.
+        return np.where(self.lengths == 0, len(source), score)
+
+    def lcs_lengths(self, source:str):
+        """longest_common_subsequence(target, source) for every target."""
+        v = self.all_bits.copy()
+        for c in source:
+            u = v & self.masks.get(c, self.no_match)
+            v = ((v + u) | (v - u)) & self.all_bits
+        return self.lengths - popcount(v)
+
+def popcount(x):
+    """The number of 1 bits in each entry of a uint64 array."""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = ((x & np.uint64(0x3333333333333333)) +
+         ((x >> np.uint64(2)) & np.uint64(0x3333333333333333)))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
 
 def similarity(s1, s2):
     """Longest common subsequence over the length of the longer word, squared.
@@ -39,4 +127,73 @@ def similarity(s1, s2):
     """
     lcs = longest_common_subsequence(s1, s2)
     longer = max(len(s1), len(s2))
-    return (lcs / longer) ** 2
\ No newline at end of file
+    return (lcs / longer) ** 2
+
+def soft_minimum(costs, weights, softness):
+    """A weighted, smooth minimum of costs, along the first axis.
+
+    This is -softness * log(sum of weight * exp(-cost / softness)),
+    with weights that sum to 1. It is never below the plain minimum,
+    and a cost with a smaller weight counts as if it were a bit higher
+    (by -softness * log(weight)). If all the costs are equal, it is that
+    cost. With softness 0, it is the plain minimum, whatever the weights.
+    """
+    costs = np.asarray(costs, dtype=float)
+    lowest = costs.min(axis=0)
+    if softness == 0:
+        return lowest
+    weights = np.asarray(weights, dtype=float)
+    weights = weights.reshape(weights.shape + (1,) * (costs.ndim - 1))
+    # shift by the minimum so that exp() can't underflow to all zeros.
+    total = (weights * np.exp((lowest - costs) / softness)).sum(axis=0)
+    return lowest - softness * np.log(total)
+
+def linear_assignment(costs):
+    """The cheapest way to give each row of costs a different column.
+
+    costs is an n by m array, with n <= m. Return a list of n column
+    indices, one per row, minimizing the total of the chosen costs.
+    This is the Hungarian algorithm, with shortest augmenting paths,
+    in O(n^2 m) time. Each inner step is vectorized over the columns.
+    """
+    n, m = costs.shape
+    if n > m:
+        raise ValueError(f"More rows than columns: {n} > {m}")
+    # potentials of rows and columns, and the row matched to each column.
+    # column 0 and row 0 are dummies; real ones are counted from 1.
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        # grow a tree of tight edges until it reaches a free column.
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            slack = costs[i0 - 1] - u[i0] - v[1:]
+            better = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = j0
+            free_slack = np.where(used[1:], np.inf, min_slack[1:])
+            j1 = int(np.argmin(free_slack)) + 1
+            delta = free_slack[j1 - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        # flip the matching along the augmenting path.
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    choices = [0] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            choices[match[j] - 1] = j - 1
+    return choices
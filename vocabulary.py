@@ -1,113 +1,703 @@
+import math
 import random
-from itertools import combinations
+
+import numpy as np
 
 from constants import ONSETS, VOWELS
 
-from word import Word
-from wordform import Wordform, WORDFORMS
-
-
-# some word shapes that are useful to keep as constants
-SHAPES = [
-    # one-syllable words
-    Wordform('o').shape(),
-    Wordform('po').shape(),
-    Wordform('on').shape(),
-    Wordform('pon').shape(),
-    # two-syllable words
-    Wordform('opo').shape(),
-    Wordform('opon').shape(),
-    Wordform('popo').shape(),
-    Wordform('popon').shape(),
-    Wordform('onpo').shape(),
-    Wordform('onpon').shape(),
-    Wordform('ponpo').shape(),
-    Wordform('ponpon').shape(),
-    # three-syllable words
-    # (this is the most common, but there are many others)
-    Wordform('popopo').shape(),
-    ]
+import tables
+from trie import Trie
+from utils import linear_assignment
+from word import Word, SOURCE_SOFTNESS
+from wordform import Wordform
+
+# weights of the pairwise costs.
+# all but the prefix cost are also scaled by the pair's importance.
+SIMILARITY_WEIGHT = 10.0
+WORD_SHAPE_WEIGHT = 2.5
+FIRST_SOUND_WEIGHT = 2.5
+PREFIX_WEIGHT = 1.0
+
+
+def __getattr__(name):
+    """Build SHAPES the first time it is used, and keep it."""
+    global SHAPES
+    if name == 'SHAPES':
+        # some word shapes that are useful to keep as constants
+        SHAPES = [
+            # one-syllable words
+            Wordform('o').shape(),
+            Wordform('po').shape(),
+            Wordform('on').shape(),
+            Wordform('pon').shape(),
+            # two-syllable words
+            Wordform('opo').shape(),
+            Wordform('opon').shape(),
+            Wordform('popo').shape(),
+            Wordform('popon').shape(),
+            Wordform('onpo').shape(),
+            Wordform('onpon').shape(),
+            Wordform('ponpo').shape(),
+            Wordform('ponpon').shape(),
+            # three-syllable words
+            # (this is the most common, but there are many others)
+            Wordform('popopo').shape(),
+            ]
+        return SHAPES
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class Vocabulary:
     """A mapping from Words to Wordforms."""
 
-    def __init__(self, words:list, importances:list=None):
+    def __init__(self, words:list, importances:list=None, debug:bool=False,
+                 seed:int=None, verbose:bool=False,
+                 favorites:str=None, memory_limit:int=None,
+                 pair_threshold:float=0.0, pinned:dict=None):
         """Create a vocabulary with given Words with the given importances.
         
         Importances are normalized to sum to 1.
-        If none are given, all importances will be 1/len(words)."""
-        self.size = len(words)
+        If none are given, all importances will be 1/len(words).
+        In debug mode, every accepted change is checked against cost().
+        All random choices are made with self.rng, seeded with seed.
+        If verbose, print the choices made while initializing.
+        Wordforms start out as set_favorites(favorites): by default,
+        'optimal', or 'greedy' for a large vocabulary.
+
+        pinned is a dict from some of the words to the wordforms they
+        always keep (which don't have to be in WORDFORMS). Pinned words
+        aren't in self.words, which are only the words that can change.
+        Their cost with each other is worked out once, as pinned_cost,
+        and their cost with each wordform is folded into solo_rows.
+
+        With a memory_limit (in bytes), this is a large vocabulary:
+        there are no pair_rows, and similarities are computed a block at
+        a time, with each block of at most about memory_limit bytes.
+        The limit only covers those blocks. Each word still has a row of
+        source_costs (a byte per wordform) and of solo_rows (8 bytes per
+        wordform), so those take about 9 * len(words) * tables.SIZE bytes.
+        Then pairs of words whose importances multiply to less than
+        pair_threshold can be left out of the similarity cost. The most
+        that leaves out is error_bound: the true cost is between cost()
+        and cost() + error_bound."""
         # importance is a dict from Word to (normalized) importance
         if importances:
             total_imp = sum(importances)
             normalized_imp = [i/total_imp for i in importances]
             self.importances = dict(zip(words, normalized_imp))
         else:
-            self.importances = {w: 1/self.size for w in words}
-        # words is a list of Words, highest importance first
-        self.words = sorted(words,
+            self.importances = {w: 1/len(words) for w in words}
+        self.pinned = dict(pinned or {})
+        if any(w not in self.importances for w in self.pinned):
+            raise ValueError("Pinned words must be in words.")
+        if len(set(self.pinned.values())) < len(self.pinned):
+            raise ValueError("Pinned words must have different wordforms.")
+        # words is a list of the unpinned Words, highest importance first
+        self.words = sorted((w for w in words if w not in self.pinned),
                             key=lambda w: self.importances[w],
                             reverse=True)
+        self.size = len(self.words)
         # wordforms is a dict from Word to Wordform
         self.wordforms = {w: None for w in words}
-        self.set_favorites()
-
-    def set_favorites(self):
-        """Set Wordforms so as to minimize inherent and source costs only."""
-        print("INITIALIZING...")
-        for w in self.words:
-            # best wordforms first.
-            solo_cost = lambda wf: wf.inherent_cost() + w.source_cost(wf)
-            best_wordforms = sorted(WORDFORMS, key=solo_cost)
-            # take the first wordfrom that isn't already in the vocabulary.
-            for wf in best_wordforms:
+        self.debug = debug
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        # the same assignment as arrays, in the order of self.words:
+        # each word's position, importance, and wordform index,
+        # each word's solo cost with every wordform,
+        # and the pairwise cost rows of each word's wordform.
+        self.positions = {w: i for i, w in enumerate(self.words)}
+        self.importance_array = np.array([self.importances[w]
+                                          for w in self.words])
+        self.indices = np.full(self.size, -1)
+        # owners is a dict from Wordform to the Word that has it,
+        # and taken says which wordforms (by index) have an owner.
+        self.owners = {}
+        self.taken = np.zeros(tables.SIZE, dtype=bool)
+        for w, wf in self.pinned.items():
+            self.wordforms[w] = wf
+            self.owners[wf] = w
+            if wf.spelling() in tables.INDEX:
+                self.taken[tables.INDEX[wf.spelling()]] = True
+        self.pinned_taken = self.taken.copy()
+        # source_costs[i, j] is words[i].source_cost(WORDFORMS[j]).
+        self.source_costs = tables.source_cost_matrix(
+            [w.sources for w in self.words], SOURCE_SOFTNESS)
+        # each wordform's cost with all the pinned words: the pair costs
+        # scaled by pinned importance (to be scaled by the word's too),
+        # and the prefix costs. these don't change, so every word's share
+        # of them is part of its solo cost.
+        self.pinned_pairs = np.zeros(tables.SIZE)
+        self.pinned_prefixes = np.zeros(tables.SIZE)
+        for w, wf in self.pinned.items():
+            similarity, shape, first_sound, prefix = tables.rows_of(wf)
+            self.pinned_pairs += self.importances[w] * (
+                similarity * SIMILARITY_WEIGHT +
+                shape * WORD_SHAPE_WEIGHT +
+                first_sound * FIRST_SOUND_WEIGHT)
+            self.pinned_prefixes += prefix * PREFIX_WEIGHT
+        # built in place, so there is only ever one n x M array of floats.
+        self.solo_rows = self.source_costs + (tables.INHERENT_COSTS +
+                                              2 * self.pinned_pairs)
+        self.solo_rows *= self.importance_array[:, np.newaxis]
+        self.solo_rows += self.pinned_prefixes
+        self.pinned_cost = self.pinned_only_cost()
+        if pair_threshold and memory_limit is None:
+            raise ValueError("pair_threshold needs a memory_limit.")
+        self.memory_limit = memory_limit
+        self.pair_threshold = pair_threshold
+        if memory_limit is None:
+            self.pair_rows = np.zeros((self.size, tables.SIZE))
+        else:
+            self.pair_rows = None
+        self.set_partners(pair_threshold)
+        # the shape and first sound costs only ask whether two wordforms
+        # are in the same bucket (have the same code), so instead of rows
+        # they keep the total importance of the words in each bucket.
+        self.shape_sums = np.zeros(tables.SHAPE_COUNT)
+        self.first_sound_sums = np.zeros(tables.FIRST_SOUND_COUNT)
+        self.importance_squares = float(self.importance_array @
+                                         self.importance_array)
+        # only a few pairs have a prefix cost, so instead of rows there is
+        # a trie of the assigned spellings, each with how many words have it.
+        self.prefix_trie = Trie()
+        if favorites is None:
+            # the optimal assignment is cubic in the number of words.
+            favorites = 'optimal' if memory_limit is None else 'greedy'
+        self.set_favorites(favorites)
+
+    def set_favorites(self, method:str='optimal'):
+        """Set Wordforms so as to minimize inherent and source costs only.
+
+        The 'optimal' method solves this exactly, as an assignment problem:
+        the importance-weighted total of the solo costs is as low as it
+        can be. The 'greedy' method is faster: most important word first,
+        each word gets its favorite wordform that isn't already taken.
+        Raise a ValueError if there are more words than free wordforms.
+        """
+        available = int(np.count_nonzero(~self.pinned_taken))
+        if self.size > available:
+            raise ValueError(f"{self.size} words, but only {available} "
+                             f"wordforms to give them.")
+        if self.verbose:
+            print("INITIALIZING...")
+        if method == 'optimal':
+            # pinned wordforms are never available.
+            free = np.flatnonzero(~self.pinned_taken)
+            choices = free[linear_assignment(self.solo_rows[:, free])]
+        elif method == 'greedy':
+            choices = self.greedy_favorites()
+        else:
+            raise ValueError(f"Unknown method: {method}")
+        for w, j in zip(self.words, choices):
+            wf = tables.WORDFORMS[j]
+            self.assign(w, wf)
+            if self.verbose:
                 inherent_cost = wf.inherent_cost()
-                source_cost = w.source_cost(wf)
-                if wf in self.wordforms.values():
-                    print(f'{w!s} wants {wf!s} ({inherent_cost} + {source_cost} = {inherent_cost+source_cost}), but it is already taken.')
-                    pass
-                else:
-                    print(f'{w!s} -> {wf!s} ({inherent_cost} + {source_cost} = {inherent_cost+source_cost})\n')
-                    self.wordforms[w] = wf
-                    break
+                source_cost = self.source_cost(w, wf)
+                print(f'{w!s} -> {wf!s} ({inherent_cost} + {source_cost} = {inherent_cost+source_cost})')
+        # running total of cost(), kept up to date by every change.
+        self.total_cost = self.cost()
 
-    def cost(self):
-        """The cost ('badness') of this vocabulary."""
+    def greedy_favorites(self):
+        """Each word's favorite wordform not taken by a more important word.
+
+        Return the wordform indices, in the order of self.words.
+        Ties go to the wordform that comes first in WORDFORMS.
+        """
+        choices = []
+        taken = set(np.flatnonzero(self.pinned_taken))
+        for i in range(self.size):
+            row = self.solo_rows[i]
+            # with only len(taken) wordforms taken,
+            # one of the best len(taken)+1 must be free.
+            k = min(len(taken) + 1, tables.SIZE)
+            best = np.argpartition(row, k - 1)[:k]
+            best = best[np.lexsort((best, row[best]))]
+            j = next(int(j) for j in best if j not in taken)
+            taken.add(j)
+            choices.append(j)
+        return choices
+
+    def owner(self, wordform):
+        """The Word that has the given wordform, or None."""
+        return self.owners.get(wordform)
+
+    def source_cost(self, word, wordform):
+        """word.source_cost(wordform), from the table of source costs."""
+        return self.source_costs[self.positions[word],
+                                 tables.index(wordform)].item()
+
+    def solo_cost(self, word, wordform):
+        """The cost of word having wordform, ignoring all unpinned words."""
+        return float(self.solo_rows[self.positions[word],
+                                    tables.index(wordform)])
+
+    def assign(self, word, wordform):
+        """Give word the given wordform, which must be in WORDFORMS."""
+        i, j = self.positions[word], tables.index(wordform)
+        # let go of the old wordform, unless someone else already took it.
+        old_wf = self.wordforms[word]
+        if old_wf is not None and self.owners.get(old_wf) is word:
+            del self.owners[old_wf]
+            self.taken[old_wf.index] = False
+        self.wordforms[word] = tables.WORDFORMS[j]
+        self.owners[tables.WORDFORMS[j]] = word
+        self.taken[j] = True
+        imp = self.importance_array[i]
+        for sums, codes, _ in self.buckets():
+            if self.indices[i] >= 0:
+                sums[codes[self.indices[i]]] -= imp
+            sums[codes[j]] += imp
+        if self.indices[i] >= 0:
+            spelling = tables.SPELLINGS[self.indices[i]]
+            count = self.prefix_trie.get(spelling)
+            if count == 1:
+                self.prefix_trie.remove(spelling)
+            else:
+                self.prefix_trie.insert(spelling, count - 1)
+        spelling = tables.SPELLINGS[j]
+        self.prefix_trie.insert(spelling,
+                                self.prefix_trie.get(spelling, 0) + 1)
+        self.indices[i] = j
+        if self.pair_rows is not None:
+            self.pair_rows[i] = self.pair_row(j)
+
+    def pair_row(self, j:int):
+        """The importance-scaled pair costs of WORDFORMS[j] with every wordform.
+
+        (That is, the similarity cost, before multiplying by the importance
+        of the pair. The shape and first sound costs are kept in buckets,
+        and the prefix cost isn't scaled by importance.)
+        """
+        return tables.similarity_row(j) * SIMILARITY_WEIGHT
+
+    def set_partners(self, pair_threshold:float):
+        """Pair each word only with the words it has enough importance with.
+
+        partners[i] is how many words word i is paired with: since words
+        are sorted by importance, those are the first partners[i] words.
+        Also set error_bound, the most the unpaired words could cost.
+        """
+        imp = self.importance_array
+        with np.errstate(divide='ignore', invalid='ignore'):
+            needed = pair_threshold / imp
+        # with no threshold, words of importance 0 are paired too.
+        needed[np.isnan(needed)] = 0.0
+        self.partners = np.searchsorted(-imp, -needed, side='right')
+        # similarity is at most 1, and the pair importance is the sum of
+        # imp[i] * imp[k] over every ordered pair (i, k) left out.
+        after = np.append(np.cumsum(imp[::-1])[::-1], 0.0)
+        left_out = imp @ after[self.partners]
+        unpaired = np.arange(self.size) >= self.partners
+        left_out -= imp[unpaired] @ imp[unpaired]
+        self.error_bound = float(left_out) * SIMILARITY_WEIGHT
+
+    def pair_columns(self, js, limit:int):
+        """pair_row(j)[k] for each j in js and each of the first limit
+        words' wordforms k, as an array with a row for each j."""
+        if self.pair_rows is not None:
+            return self.pair_rows[:limit, js].T
+        return (tables.similarity_block(js, self.indices[:limit]) *
+                SIMILARITY_WEIGHT)
+
+    def block_rows(self, columns:int):
+        """How many rows of a block with the given columns fit in memory."""
+        # at least one, so there is a step even with no words.
+        if self.memory_limit is None:
+            return max(1, self.size)
+        # a float per entry, with room for a few temporaries like it.
+        return max(1, self.memory_limit // (4 * 8 * max(1, columns)))
+
+    def pinned_only_cost(self):
+        """The cost of the pinned words, as if there were no other words."""
         cost = 0
-        # cost of each word alone
-        for w in self.wordforms:
-            importance = self.importances[w]
-            wf = self.wordforms[w]
-            cost += wf.inherent_cost() * importance
-            cost += w.source_cost(wf) * importance
-        # cost of pairs of words
-        for (w1, wf1), (w2, wf2) in combinations(self.wordforms.items(), 2):
-            # importance is double the product of the importances,
-            # because we're only actually visiting each pair once,
-            # while the full cartesian product would visit each pair twice.
-            importance = self.importances[w1] * self.importances[w2] * 2
-            cost += wf1.similarity_cost(wf2) * importance * 10.0
-            cost += wf1.word_shape_cost(wf2) * importance * 2.5
-            cost += wf1.first_sound_cost(wf2) * importance * 2.5
-            cost += wf1.prefix_cost(wf2) * 1.0
+        pinned = list(self.pinned.items())
+        for a, (w1, wf1) in enumerate(pinned):
+            imp1 = self.importances[w1]
+            cost += (wf1.inherent_cost() + w1.source_cost(wf1)) * imp1
+            for w2, wf2 in pinned[a+1:]:
+                importance = 2 * imp1 * self.importances[w2]
+                cost += importance * (
+                    wf1.similarity_cost(wf2) * SIMILARITY_WEIGHT +
+                    wf1.word_shape_cost(wf2) * WORD_SHAPE_WEIGHT +
+                    wf1.first_sound_cost(wf2) * FIRST_SOUND_WEIGHT)
+                cost += wf1.prefix_cost(wf2) * PREFIX_WEIGHT
         return cost
-    
+
+    def pair_entry(self, j1:int, j2:int):
+        """One entry of pair_row(j1): the pair cost with WORDFORMS[j2]."""
+        return tables.similarity(j1, j2) * SIMILARITY_WEIGHT
+
+    def buckets(self):
+        """(importance per bucket, bucket of each wordform, weight),
+        for the shape cost and for the first sound cost."""
+        return [(self.shape_sums, tables.SHAPE_CODES, WORD_SHAPE_WEIGHT),
+                (self.first_sound_sums, tables.FIRST_SOUND_CODES,
+                 FIRST_SOUND_WEIGHT)]
+
+    def bucket_cost(self):
+        """The shape and first sound costs of all pairs of words.
+
+        For pairs in the same bucket, the pair importance 2*imp1*imp2
+        adds up to the bucket's total importance squared, less each
+        word's own importance squared. So this is O(buckets), not O(n^2).
+        """
+        return sum((sums @ sums - self.importance_squares) * weight
+                   for sums, _, weight in self.buckets())
+
+    def bucket_delta(self, moved, old, new):
+        """How much bucket_cost() would change if words moved from old to new.
+
+        moved are the positions of the words, and old and new their
+        wordform indices. Only the buckets that change are visited,
+        so this is O(len(moved)).
+        """
+        delta = 0.0
+        if len(moved) == 1:
+            # one word, with importance x, from bucket a to bucket b.
+            x = self.importance_array[moved[0]]
+            for sums, codes, weight in self.buckets():
+                a, b = codes[old[0]], codes[new[0]]
+                if a != b:
+                    delta += weight * 2 * x * (sums[b] - sums[a] + x)
+            return delta
+        for sums, codes, weight in self.buckets():
+            changes = {}
+            for i, j_old, j_new in zip(moved, old, new):
+                a, b = codes[j_old], codes[j_new]
+                if a != b:
+                    imp = self.importance_array[i]
+                    changes[a] = changes.get(a, 0.0) - imp
+                    changes[b] = changes.get(b, 0.0) + imp
+            for bucket, change in changes.items():
+                delta += weight * change * (2 * sums[bucket] + change)
+        return delta
+
+    def prefix_partner_cost(self, j:int):
+        """The prefix cost of WORDFORMS[j] with every assigned wordform.
+
+        Only the assigned spellings that are a prefix of this one
+        (its ancestors in the trie) or that it is a prefix of (its
+        descendants) are visited. If WORDFORMS[j] is assigned,
+        this includes its cost with itself, 2 + its length.
+        """
+        s = tables.SPELLINGS[j]
+        cost = 0
+        for t, count in self.prefix_trie.ancestors(s):
+            cost += count * (2 + len(t))
+        for t, count in self.prefix_trie.descendants(s):
+            if len(t) > len(s):
+                cost += count * (2 + len(s))
+        return cost * PREFIX_WEIGHT
+
+    def prefix_delta(self, old, new):
+        """How much the prefix cost would change if wordforms old became new.
+
+        old and new are lists of wordform indices, one per moving word.
+        """
+        delta = 0.0
+        for a in range(len(old)):
+            # the costs with the words that stay, by way of the trie,
+            # which also still has the old wordforms of the moving words.
+            delta += (self.prefix_partner_cost(new[a]) -
+                      self.prefix_partner_cost(old[a]))
+            for b in range(len(old)):
+                delta -= PREFIX_WEIGHT * (tables.prefix_cost(new[a], old[b]) -
+                                          tables.prefix_cost(old[a], old[b]))
+            # the costs among the moving words.
+            for b in range(a + 1, len(old)):
+                delta += PREFIX_WEIGHT * (tables.prefix_cost(new[a], new[b]) -
+                                          tables.prefix_cost(old[a], old[b]))
+        return delta
+
+    def cost(self):
+        """The cost ('badness') of this vocabulary."""
+        # cost of the pinned words, which never changes,
+        # and of each other word alone (including with the pinned words)
+        cost = self.pinned_cost
+        cost += self.solo_rows[np.arange(self.size), self.indices].sum()
+        # cost of pairs of words.
+        # the weighted sum over the cartesian product of words and their
+        # partners visits each pair twice, which is what we want: pair
+        # importance is double the product of the importances.
+        # the diagonal (each word with itself) is removed.
+        # this goes a block of words at a time, with just their partners.
+        imp = self.importance_array
+        step = self.block_rows(self.size)
+        for start in range(0, self.size, step):
+            block = np.arange(start, min(start + step, self.size))
+            limit = self.partners[start]
+            pairs = self.pair_columns(self.indices[block], limit)
+            paired = ((np.arange(limit) < self.partners[block, np.newaxis]) &
+                      (np.arange(limit) != block[:, np.newaxis]))
+            cost += imp[block] @ (pairs * paired) @ imp[:limit]
+        cost += self.bucket_cost()
+        # the prefix cost isn't scaled by importance. each word's partners
+        # include itself, and each pair of words is counted from both ends.
+        for j in self.indices:
+            cost += (self.prefix_partner_cost(j) -
+                     PREFIX_WEIGHT * tables.prefix_cost(j, j)) / 2
+        return float(cost)
+
+    def cost_delta(self, word, new_wf):
+        """How much cost() would change if word were given new_wf.
+
+        Only the terms involving word are visited, so this is O(n)
+        rather than the O(n^2) of calling cost() before and after.
+        Each assigned wordform's row holds its cost with new_wf.
+        """
+        i = self.positions[word]
+        old_wf = self.wordforms[word]
+        new, old = tables.index(new_wf), old_wf.index
+        delta = self.solo_cost(word, new_wf) - self.solo_cost(word, old_wf)
+        imp = self.importance_array
+        limit = self.partners[i]
+        columns = self.pair_columns([new, old], limit)
+        pairs = columns[0] - columns[1]
+        if i < limit:
+            pairs[i] = 0
+        delta += 2 * imp[i] * (imp[:limit] @ pairs)
+        delta += self.bucket_delta((i,), (old,), (new,))
+        delta += self.prefix_delta((old,), (new,))
+        return float(delta)
+
+    def move_delta(self, move:dict):
+        """How much cost() would change if every word in move got its wordform.
+
+        move is a dict from Word to Wordform. After the move, no two words
+        may have the same wordform: for example, words can swap wordforms.
+        For k words, this is O(k*n + k^2).
+        """
+        if len(move) == 1:
+            return self.cost_delta(*next(iter(move.items())))
+        imp = self.importance_array
+        moved = np.array([self.positions[w] for w in move])
+        old = self.indices[moved]
+        new = np.array([tables.index(wf) for wf in move.values()])
+        delta = (self.solo_rows[moved, new].sum() -
+                 self.solo_rows[moved, old].sum())
+        # pairs of a word that moves with a word that doesn't.
+        limit = self.partners[moved].max()
+        still = np.ones(limit)
+        still[moved[moved < limit]] = 0
+        columns = self.pair_columns(np.concatenate([new, old]), limit)
+        pairs = columns[:len(moved)] - columns[len(moved):]
+        pairs *= np.arange(limit) < self.partners[moved, np.newaxis]
+        delta += 2 * imp[moved] @ (pairs @ (still * imp[:limit]))
+        delta += self.bucket_delta(moved, old, new)
+        delta += self.prefix_delta(old, new)
+        # pairs of words that both move.
+        for a in range(len(moved)):
+            for b in range(a + 1, len(moved)):
+                if moved[b] >= self.partners[moved[a]]:
+                    continue
+                importance = imp[moved[a]] * imp[moved[b]] * 2
+                delta += importance * (self.pair_entry(new[a], new[b]) -
+                                       self.pair_entry(old[a], old[b]))
+        return float(delta)
+
+    def check_cost(self):
+        """Check that the running total_cost agrees with a full cost().
+
+        Also check the importance in each bucket against the wordforms.
+        If either disagrees, raise an AssertionError.
+        """
+        for sums, codes, _ in self.buckets():
+            counted = np.bincount(codes[self.indices],
+                                  weights=self.importance_array,
+                                  minlength=len(sums))
+            if not np.allclose(sums, counted, rtol=0, atol=1e-9):
+                raise AssertionError(f"Buckets {sums} disagree with {counted}.")
+        full_cost = self.cost()
+        if not math.isclose(self.total_cost, full_cost,
+                            rel_tol=1e-9, abs_tol=1e-9):
+            raise AssertionError(f"Running cost {self.total_cost} "
+                                 f"disagrees with full cost {full_cost}.")
+
+    def change(self, word, wordform, delta:float):
+        """Give word the given wordform, which changes cost() by delta."""
+        self.assign(word, wordform)
+        self.total_cost += delta
+        if self.debug:
+            self.check_cost()
+
+    def make_move(self, move:dict, delta:float):
+        """Give every word in move its wordform, which changes cost() by delta."""
+        for word, wordform in move.items():
+            self.assign(word, wordform)
+        self.total_cost += delta
+        if self.debug:
+            self.check_cost()
+
+    def random_move(self):
+        """Choose a random word and a random new wordform for it.
+
+        Return (word, wordform), or None if the wordform is already taken
+        (or there are no words to choose from).
+        """
+        if self.size == 0:
+            return None
+        word = self.rng.choice(self.words)
+        new_wf = self.rng.choice(tables.WORDFORMS)
+        if self.taken[new_wf.index]:
+            return None
+        return word, new_wf
+
+    def random_swap(self):
+        """Choose two random words to swap wordforms, as a move dict.
+
+        Return None if there aren't two words.
+        """
+        if self.size < 2:
+            return None
+        w1, w2 = self.rng.sample(self.words, 2)
+        return {w1: self.wordforms[w2], w2: self.wordforms[w1]}
+
+    def random_rotation(self, k:int=3):
+        """Choose k random words to rotate wordforms, as a move dict.
+
+        Each word gets the wordform of the next one,
+        and the last word gets the wordform of the first.
+        Return None if there aren't k words.
+        """
+        if self.size < k:
+            return None
+        words = self.rng.sample(self.words, k)
+        return {w: self.wordforms[words[(a + 1) % k]]
+                for a, w in enumerate(words)}
+
+    def assignment(self):
+        """The wordform index of each word, in the order of self.words."""
+        return [int(j) for j in self.indices]
+
+    def restore(self, assignment:list):
+        """Give each word the wordform with the given index.
+
+        This is the inverse of assignment().
+        """
+        for w, j in zip(self.words, assignment):
+            self.assign(w, tables.WORDFORMS[j])
+        self.total_cost = self.cost()
+
     def alter_if_better(self):
         """Randomly alter this Vocabulary, if it reduces the cost()."""
-        old_cost = self.cost()
-        # choose one word, and change it randomly in place
-        word, old_wf = random.choice(list(self.wordforms.items()))
-        new_wf = random.choice(WORDFORMS)
+        # choose one word, and a random new wordform for it.
         # if the new wordform matches an existing wordform,
         # don't accept the change
-        if new_wf in self.wordforms.values():
+        move = self.random_move()
+        if move is None:
             return
-        # make the change.
-        self.wordforms[word] = new_wf
-        # if the cost gets worse (higher), revert the change.
-        new_cost = self.cost()
-        if new_cost > old_cost:
-            self.wordforms[word] = old_wf
+        # if the cost would get worse (higher), don't make the change.
+        word, new_wf = move
+        delta = self.cost_delta(word, new_wf)
+        if delta > 0:
+            return
+        self.change(word, new_wf, delta)
+
+    def candidate_costs(self, word):
+        """The cost of word having each wordform, given all the other words.
+
+        This is word's solo cost plus its pair costs with the current
+        assignment, for every wordform in WORDFORMS at once.
+        Wordforms that other words already have cost infinity.
+        """
+        i = self.positions[word]
+        costs = self.solo_rows[i] + self.interaction_costs(
+            self.importance_array[i], self.partners[i], exclude=i)
+        own_cost = costs[self.indices[i]]
+        costs[self.taken] = np.inf
+        costs[self.indices[i]] = own_cost
+        return costs
+
+    def interaction_costs(self, importance:float, limit:int, exclude=None):
+        """The pair costs of a word with each wordform and the unpinned words.
+
+        The word has the given importance, and its similarity is only
+        counted with the first limit words (see set_partners). The word
+        at position exclude, if any, is left out: that's the word itself.
+        """
+        others = self.importance_array[:limit].copy()
+        if exclude is not None and exclude < limit:
+            others[exclude] = 0
+        if self.pair_rows is not None:
+            pairs = others @ self.pair_rows[:limit]
+        else:
+            pairs = np.zeros(tables.SIZE)
+            step = self.block_rows(tables.SIZE)
+            for start in range(0, limit, step):
+                block = slice(start, min(start + step, limit))
+                pairs += others[block] @ tables.similarity_block(
+                    self.indices[block], np.arange(tables.SIZE))
+            pairs *= SIMILARITY_WEIGHT
+        costs = 2 * importance * pairs
+        # the total importance of the other words in each bucket.
+        for sums, codes, weight in self.buckets():
+            if exclude is not None:
+                sums = sums.copy()
+                own = codes[self.indices[exclude]]
+                sums[own] -= self.importance_array[exclude]
+            costs += 2 * importance * weight * sums[codes]
+        # the prefix costs with the other words' wordforms.
+        for k, j in enumerate(self.indices):
+            if k != exclude:
+                partners, prefix_costs = tables.prefix_partners(j)
+                costs[partners] += prefix_costs * PREFIX_WEIGHT
+        return costs
+
+    def suggest(self, word, importance:float, k:int=10):
+        """The best k free wordforms for a new word, without adding it.
+
+        importance is on the same scale as self.importances, which sum
+        to 1 (adding the word doesn't change the others' importances).
+        Return a list of (Wordform, delta), lowest delta first, where
+        delta is how much cost() would go up with the word added.
+        Nothing in the vocabulary is changed.
+        Raise a ValueError unless importance is positive.
+        """
+        if not importance > 0:
+            raise ValueError(f"Importance must be positive: {importance}")
+        imp = self.importance_array
+        needed = self.pair_threshold / importance
+        limit = np.searchsorted(-imp, -needed, side='right')
+        source = tables.sources_cost_row(word.sources, SOURCE_SOFTNESS)
+        costs = (tables.INHERENT_COSTS + source) * importance
+        costs += 2 * importance * self.pinned_pairs + self.pinned_prefixes
+        costs += self.interaction_costs(importance, limit)
+        costs[self.taken] = np.inf
+        k = min(k, int(np.count_nonzero(~self.taken)))
+        if k <= 0:
+            return []
+        best = np.argpartition(costs, k - 1)[:k]
+        best = best[np.lexsort((best, costs[best]))]
+        return [(tables.WORDFORMS[j], float(costs[j])) for j in best]
+
+    def best_response(self, word):
+        """Give word its best free wordform, given all the other words.
+
+        Return the change in cost(), which is never positive.
+        """
+        costs = self.candidate_costs(word)
+        old, new = self.indices[self.positions[word]], int(np.argmin(costs))
+        delta = float(costs[new] - costs[old])
+        if delta >= 0:
+            return 0.0
+        self.change(word, tables.WORDFORMS[new], delta)
+        return delta
+
+    def descend(self, max_passes:int=None):
+        """Sweep best_response() over all words until none can improve.
+
+        This reaches a local optimum: no single word can change its wordform
+        to reduce the cost. Return the number of passes made.
+        """
+        passes = 0
+        while max_passes is None or passes < max_passes:
+            passes += 1
+            delta = sum(self.best_response(w) for w in self.words)
+            if delta == 0:
+                break
+        return passes
 
     def bar_graph(self, title, function):
         """A string bar graph: how many function(word) are in each category?
@@ -191,7 +781,9 @@ class Vocabulary:
 
         # importance
         s += 'IMPORTANCE\n'
-        for w in self.words:
+        # all the words, pinned or not.
+        for w in sorted(self.wordforms, key=lambda w: self.importances[w],
+                        reverse=True):
             s += f'{self.importances[w]:.3f} '
             s += f'{w!s:16s} '
             s += '-> '
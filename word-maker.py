@@ -1,5 +1,28 @@
+"""Make a vocabulary: find a wordform for each word.
+
+Usage: python word-maker.py [--words FILE] [--importances FILE]
+           [--iterations N] [--seconds S] [--plateau N] [--seed N]
+           [--output FILE] ...   (see --help)
+
+Without a word list, this makes the nimi pu vocabulary below.
+Progress is written to stdout as one JSON object per line, at most
+once every --progress seconds. The search stops when any budget runs
+out, or on Ctrl-C, and then the best vocabulary found is written to
+--output as JSON (or printed to stderr, without --output).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import checkpoint
+import tables
+from constants import CACHE_DIR, MAX_CACHE_SIZE
 from word import Word
 from vocabulary import Vocabulary
+from optimizer import (Optimizer, Greedy, SimulatedAnnealing, Tabu,
+                       LateAcceptance)
 
 nimi_pu_list = [
     'a', 'akesi', 'ala', 'alasa', 'ale', 'anpa', 'ante', 'anu', 'awen',
@@ -30,17 +53,163 @@ nimi_pu_importance = [imp**.5 for imp in nimi_pu_freq]
 nimi_pu_words = [Word('aj'), Word('pi'), Word(''), Word('tak'), Word('kut'), Word('tis'), Word('a'), Word(''), Word('nat'), Word('ju'), Word('at'), Word('pok'), Word('tu'), Word('ap'), Word('no'), Word('tajm'), Word('tej'), Word('want'), Word('meni'), Word('pat'), Word('o'), Word('kama'), Word('ken'), Word('pil'), Word('nejm'), Word('pat'), Word('smal'), Word('pikas'), Word('aws'), Word('wak'), Word('lant'), Word('imas'), Word('jus'), Word('pan'), Word('ap'), Word('put'), Word('luk'), Word('lajk'), Word('wata'), Word('slip'), Word('wat'), Word('tul'), Word('al'), Word('ent'), Word('diprent'), Word('pik'), Word('tin'), Word('ol'), Word('stlejns'), Word('kulupu'), Word('san'), Word('kip'), Word('sawnt'), Word('puk'), Word('tu'), Word('wej'), Word('nu'), Word('plejk'), Word('en'), Word('pawa'), Word('lap'), Word('et'), Word('stej'), Word('aj'), Word('at'), Word('ejl'), Word('animal'), Word('lip'), Word('mu'), Word('wan'), Word('kolt'), Word('sakl'), Word('nanpal'), Word('plant'), Word('taj'), Word('il'), Word('swit'), Word('pajt'), Word('plak'), Word('palent'), Word('pati'), Word('klejn'), Word('ant'), Word('mawt'), Word('open'), Word('semisalit'), Word('jaki'), Word('pis'), Word('pu'), Word('insajt'), Word('tlejt'), Word('plut'), Word('sajt'), Word('mani'), Word('klot'), Word('lajn'), Word('waman'), Word('alt'), Word('kantejna'), Word('sapas'), Word('kala'), Word('man'), Word('pat'), Word('wajt'), Word('pak'), Word('stik'), Word('anta'), Word('pat'), Word('leptajl'), Word('let'), Word('mun'), Word('il'), Word('seks'), Word('pejs'), Word('skin'), Word('piajnt'), Word('jelo'), Word('plu'), Word('ant'), Word('ol')]
 
 
-#vocab = Vocabulary(words=nimi_pu_list)
-#print(vocab)
-#vocab = Vocabulary(count=120)
-#vocab = Vocabulary(words=toki_ni_words, importances=toki_ni_imp)
-vocab = Vocabulary(words=nimi_pu_words, importances=nimi_pu_importance)
-r = 0
-while True:
-    if r % 1000 == 0:
-        print('\n')
-        print(f'r = {r}, cost = {vocab.cost():.3f}')
-        #vocab.print_costs()
-        print(vocab)
-    vocab.alter_if_better()
-    r += 1
\ No newline at end of file
+
+STRATEGIES = {
+    'annealing': SimulatedAnnealing,
+    'greedy': Greedy,
+    'tabu': Tabu,
+    'late-acceptance': LateAcceptance,
+    }
+
+
+def read_words(path:str):
+    """The Words in a word list file, one per line.
+
+    A line is one source spelling, or several separated by spaces,
+    each with an optional weight: 'kalensi' or 'kalensi:2 moneta:1'.
+    A '-' is the empty source. Blank lines and '#' comments are skipped.
+    """
+    words = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#')[0].split()
+            if not line:
+                continue
+            sources = {}
+            for source in line:
+                spelling, _, weight = source.partition(':')
+                spelling = '' if spelling == '-' else spelling
+                sources[spelling] = float(weight) if weight else 1.0
+            if len(sources) == 1:
+                words.append(Word(next(iter(sources))))
+            else:
+                words.append(Word(sources=sources))
+    return words
+
+
+def read_importances(path:str):
+    """The numbers in an importance file, one per line."""
+    with open(path) as f:
+        return [float(line.split('#')[0]) for line in f
+                if line.split('#')[0].strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Find a wordform for each word.")
+    parser.add_argument('--words', help="word list file, one word per line "
+                        "(default: the nimi pu words)")
+    parser.add_argument('--importances', help="importance file, one number "
+                        "per line, in the same order as the words")
+    parser.add_argument('--iterations', type=int,
+                        help="stop after this many iterations in all, "
+                        "counting those of a resumed checkpoint")
+    parser.add_argument('--seconds', type=float,
+                        help="stop after this many seconds in all, "
+                        "counting those of a resumed checkpoint")
+    parser.add_argument('--plateau', type=int, help="stop after this many "
+                        "iterations in a row without a new best")
+    parser.add_argument('--seed', type=int, help="random seed")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='annealing')
+    parser.add_argument('--output', help="write the vocabulary here, as JSON")
+    parser.add_argument('--progress', type=float, default=1.0,
+                        help="seconds between progress lines (default 1)")
+    parser.add_argument('--quiet', action='store_true',
+                        help="no progress lines")
+    parser.add_argument('--checkpoint', help="save the search here every "
+                        "--checkpoint-interval seconds, and resume from it "
+                        "if it exists")
+    parser.add_argument('--checkpoint-interval', type=float, default=60.0)
+    parser.add_argument('--cache', default=CACHE_DIR,
+                        help=f"directory of saved tables (default {CACHE_DIR}; "
+                        f"above {MAX_CACHE_SIZE} wordforms, only source "
+                        "costs are saved)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="don't save or load tables")
+    args = parser.parse_args(argv)
+    if args.words is None:
+        args.word_list = nimi_pu_words
+        default_importances = nimi_pu_importance
+    else:
+        args.word_list = read_words(args.words)
+        default_importances = None
+    if args.importances is None:
+        args.importance_list = default_importances
+    else:
+        args.importance_list = read_importances(args.importances)
+        if len(args.importance_list) != len(args.word_list):
+            parser.error(f"{len(args.importance_list)} importances "
+                         f"for {len(args.word_list)} words")
+    return args
+
+
+class Progress:
+    """Writes Optimizer stats as JSON lines, at most every so many seconds."""
+
+    def __init__(self, interval:float, out=sys.stdout):
+        self.interval = interval
+        self.out = out
+        self.last = time.perf_counter()
+
+    def __call__(self, stats):
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.write(stats)
+
+    def write(self, stats):
+        self.out.write(json.dumps(stats) + '\n')
+        self.out.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.no_cache:
+        tables.use_cache(args.cache)
+    vocab = Vocabulary(words=args.word_list, importances=args.importance_list,
+                       seed=args.seed)
+    optimizer = Optimizer(vocab, STRATEGIES[args.strategy]())
+    checkpointer = None
+    if args.checkpoint is not None:
+        if os.path.exists(args.checkpoint):
+            checkpoint.resume(args.checkpoint, vocab, optimizer)
+        checkpointer = checkpoint.Checkpointer(
+            args.checkpoint, vocab, optimizer, args.checkpoint_interval)
+    progress = None if args.quiet else Progress(args.progress)
+    callbacks = [c for c in (progress, checkpointer) if c is not None]
+    def callback(stats):
+        for c in callbacks:
+            c(stats)
+    try:
+        # the budgets count a resumed search's earlier iterations too.
+        stats = optimizer.run(iterations=args.iterations, seconds=args.seconds,
+                              plateau=args.plateau, callback=callback,
+                              total=True)
+    except KeyboardInterrupt:
+        # stop cleanly, with the best vocabulary so far.
+        vocab.restore(optimizer.best_assignment)
+        stats = optimizer.stats()
+    if checkpointer is not None:
+        checkpointer.close()
+    if progress is not None:
+        progress.write(dict(stats, done=True))
+    if args.output is None:
+        # stdout is just progress lines; this is for people to read.
+        print(vocab, file=sys.stderr)
+        return
+    result = {
+        'cost': vocab.total_cost,
+        'stats': stats,
+        'words': [{'sources': dict(w.sources),
+                   'importance': vocab.importances[w],
+                   'wordform': vocab.wordforms[w].spelling()}
+                  for w in args.word_list],
+        }
+    temporary = f'{args.output}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(result, f, indent=1)
+    os.replace(temporary, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,28 @@
-from functools import lru_cache
-
-from constants import CACHINESS
-from utils import edit_distance
+from utils import edit_distance, soft_minimum
 from wordform import Wordform
 
+# how soft the minimum over a word's sources is (see utils.soft_minimum).
+# 0 means a plain minimum: only the closest source counts.
+SOURCE_SOFTNESS = 1.0
+
 class Word():
-    def __init__(self, source:str=''):
-        self.source = source
+    def __init__(self, source:str='', sources:dict=None):
+        """A word, with one source spelling or several weighted ones.
+
+        sources is a dict from spelling to weight, for a word that comes
+        from several languages at once. The weights are normalized to
+        sum to 1. Without sources, the only source is `source`.
+        Either way, self.source is the source with the highest weight.
+        """
+        if sources is None:
+            sources = {source: 1}
+        if not sources or min(sources.values()) <= 0:
+            raise ValueError(f"Source weights must be positive: {sources}")
+        total = sum(sources.values())
+        # sources is a tuple of (spelling, normalized weight).
+        self.sources = tuple((s, w / total) for s, w in sources.items())
+        self.source = max(sources, key=sources.get)
 
-    @lru_cache(maxsize=CACHINESS)
     def source_cost(self, wordform:Wordform):
         """The cost of the dissimilarity of this word to its source wordforms.
 
@@ -21,13 +35,26 @@ class Word():
         while 'sitelen' takes full effort (all 7 letters must be memorized).
 
         Starting with the same exact sound is worth one bonus point.
+
+        With several sources, this is a soft minimum of the cost for each
+        source, so a wordform close to any one of them is cheap.
+
+        A Vocabulary keeps a table of these for all its words at once
+        (see Vocabulary.source_cost), so this is not cached.
         """
-        cost = 0
-        cost += edit_distance(self.source, wordform.spelling())
-        if len(self.source) > 0:
-            if self.source[0] == wordform.first_sound():
-                cost -= 1
-        return cost
-    
+        costs = []
+        for source, _ in self.sources:
+            cost = edit_distance(source, wordform.spelling())
+            if len(source) > 0:
+                if source[0] == wordform.first_sound():
+                    cost -= 1
+            costs.append(cost)
+        if len(costs) == 1:
+            return costs[0]
+        weights = [w for _, w in self.sources]
+        return float(soft_minimum(costs, weights, SOURCE_SOFTNESS))
+
     def __repr__(self):
-        return f"Word('{self.source}')"
\ No newline at end of file
+        if len(self.sources) == 1:
+            return f"Word('{self.source}')"
+        return f"Word(sources={dict(self.sources)})"
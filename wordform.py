@@ -1,19 +1,99 @@
+import weakref
 from functools import lru_cache
 
-from constants import CACHINESS, VOWELS
+from constants import VOWELS
 from utils import similarity
 
-from syllable import Syllable, SYLLABLES
+from phonotactics import PHONOTACTICS
+import syllable
+from syllable import SYLLABLE_TABLE, MAX_SYLLABLE_LENGTH
+
+@lru_cache(maxsize=1 << 16)
+def _parse(word:str):
+    """Wordform.parse(), as a tuple. Each word is only parsed once."""
+    # in a toki pona word,
+    # the longest suffix that is a legal syllable
+    # is always an actual syllable of the word.
+    # so, check if the last 3 letters is a syllable,
+    # else 2 letters, else 1 letter.
+    # if none of these is a syllable, the word is not legal.
+    if not word:
+        raise ValueError(f"Empty word.")
+    syllables = []
+    end = len(word)
+    while end > 0:
+        for length in range(min(MAX_SYLLABLE_LENGTH, end), 0, -1):
+            syl = SYLLABLE_TABLE.get(word[end-length:end])
+            if syl is not None:
+                break
+        else:
+            raise ValueError(f"Invalid word: {word[:end]}")
+        syllables.append(syl)
+        end -= length
+    syllables.reverse()
+    return tuple(syllables)
 
 class Wordform:
-    def __init__(self, word:str=None, syllables:list=None):
-        """Create a word. If none provided, raise a ValueError."""
+    """A wordform. There is only ever one Wordform for each spelling.
+
+    Wordforms are immutable, and everything about them (except how they
+    compare to other wordforms) is worked out once, when the wordform
+    is first created.
+    """
+
+    __slots__ = ('syllables', 'length', 'index',
+                 '_spelling', '_shape', '_first_sound', '_inherent_cost',
+                 '__weakref__')
+
+    # the one Wordform for each spelling that is still in use.
+    # (every wordform in WORDFORMS is always in use.)
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, word:str=None, syllables:list=None):
+        """Create a word, or reuse the old one with the same spelling.
+
+        If none provided, raise a ValueError.
+        """
         if word is not None:
-            self.syllables = Wordform.parse(word)
-        elif syllables is not None:
-            self.syllables = syllables
-        else:
+            self = cls._interned.get(word)
+            if self is not None:
+                return self
+            syllables = Wordform.parse(word)
+        elif syllables is None:
             raise ValueError("Must provide a word or syllables.")
+        spelling = ''.join([s.spelling() for s in syllables])
+        self = cls._interned.get(spelling)
+        if self is not None:
+            return self
+        self = super().__new__(cls)
+        self.syllables = tuple(syllables)
+        self._spelling = spelling
+        self.length = len(spelling)
+        self._shape = ''.join([s.shape() for s in syllables])
+        self._first_sound = syllables[0].first_sound()
+        # Difficult words are bad. This is counted in two ways.
+        # Length: each letter of length of a word counts for 1 cost.
+        # Starting with a vowel: starting with a vowel costs 0.5.
+        # In other words, an initial glottal stop counts as 0.5 letters.
+        self._inherent_cost = self.length
+        if self._first_sound in VOWELS:
+            self._inherent_cost += 0.5
+        # position in WORDFORMS, if this wordform is one of them.
+        self.index = None
+        cls._interned[spelling] = self
+        return self
+
+    def is_legal(self):
+        """Does this wordform follow all the rules of PHONOTACTICS?
+
+        (Unlike parse(), this checks wuwojiti, nn, nm, and the like.)
+        """
+        return PHONOTACTICS.accepts([(s.onset, s.vowel, s.coda)
+                                     for s in self.syllables])
+
+    def __reduce__(self):
+        """Pickle as the spelling, so unpickling finds the same Wordform."""
+        return (Wordform, (self._spelling,))
 
     def parse(word:str):
         """Parse a word from the given string. Return a list of Syllables.
@@ -24,37 +104,12 @@ class Wordform:
         each of which has an optional onset, a vowel, and an optional coda.
         Rules more detailed than that (eg: wuwojiti, nn, mm) are not checked.
         """
-        # in a toki pona word,
-        # the longest suffix that is a legal syllable
-        # is always an actual syllable of the word.
-        # so, check if the last 3 letters is a syllable,
-        # else 2 letters, else 1 letter.
-        # if none of these is a syllable, the word is not legal.
-        syllables = []
-        if not word:
-            raise ValueError(f"Empty word.")
-        while word:
-            for length in [3, 2, 1, 0]:
-                # if we reach the 0 case, the word is not legal.
-                if length == 0:
-                    raise ValueError(f"Invalid word: {word}")
-                # in the other cases, try build the syllable.
-                try:
-                    syl = Syllable(word[-length:])
-                except ValueError:
-                    continue
-                else:
-                    syllables.insert(0, syl)
-                    word = word[:-length]
-                    break
-        return syllables
+        return list(_parse(word))
 
-    @lru_cache(maxsize=CACHINESS)
     def first_sound(self):
         """The first sound (onset or vowel) of the word."""
-        return self.syllables[0].first_sound()
+        return self._first_sound
 
-    @lru_cache(maxsize=CACHINESS)
     def shape(self):
         """The "shape" of the word.
         
@@ -62,9 +117,8 @@ class Wordform:
         Examples: a is O, ma is PO, en is ON, kin is PON.
         kala is POPO, akesi is OPOPO, and sitelen is POPOPON.
         """
-        return ''.join([s.shape() for s in self.syllables])
+        return self._shape
 
-    @lru_cache(maxsize=CACHINESS)
     def inherent_cost(self):
         """The cost of this wordform. Higher is worse.
         
@@ -73,48 +127,39 @@ class Wordform:
         Starting with a vowel: starting with a vowel costs 0.5.
         In other words, an initial glottal stop counts as 0.5 letters.
         """
-        cost = 0
-        cost += len(self.spelling())
-        if self.first_sound() in VOWELS:
-            cost += 0.5
-        return cost
+        return self._inherent_cost
     
-    @lru_cache(maxsize=CACHINESS)
     def prefix_cost(self, other):
         """The cost of one of these wordforms being a prefix of the other."""
         cost = 0
-        s1, s2 = self.spelling(), other.spelling()
+        s1, s2 = self._spelling, other._spelling
         if s1.startswith(s2) or s2.startswith(s1):
             cost += 2 + min(len(s1), len(s2))
         return cost
     
-    @lru_cache(maxsize=CACHINESS*CACHINESS)
     def similarity_cost(self, other):
         """The cost of these wordforms being similar strings, from 0 to 1.
         
         For example, kala and alasa have some similarity,
         although they don't have the same shape or same first sound.
         """
-        return similarity(str(self), str(other))
+        return similarity(self._spelling, other._spelling)
     
-    @lru_cache(maxsize=CACHINESS*CACHINESS)
     def word_shape_cost(self, other):
         """The cost of these wordforms having the same shape."""
-        return int(self.shape() == other.shape())
+        return int(self._shape == other._shape)
     
-    @lru_cache(maxsize=CACHINESS*CACHINESS)
     def first_sound_cost(self, other):
         """The cost of these wordforms having the same first sound."""
-        return int(self.first_sound() == other.first_sound())
+        return int(self._first_sound == other._first_sound)
 
     def __gt__(self, other):
         """Compare two wordforms by their spellings."""
-        return self.spelling() > other.spelling()
+        return self._spelling > other._spelling
     
-    @lru_cache(maxsize=CACHINESS)
     def spelling(self):
         """The actual letters of the wordform, spelled in order."""
-        return ''.join([s.spelling() for s in self.syllables])
+        return self._spelling
 
     def __repr__(self):
         """An unambiguous string representation of the wordform."""
@@ -129,19 +174,119 @@ class Wordform:
         return ''.join([str(s) for s in self.syllables])
 
 
-# all one-syllable words.
-WORDFORMS_1SYL = [Wordform(syllables=[s]) for s in SYLLABLES]
+# for each state of PHONOTACTICS, the syllables that can come next,
+# each with the state after it.
+_FOLLOWERS = [[(SYLLABLE_TABLE[''.join(PHONOTACTICS.syllables[i])], j)
+               for i, j in followers]
+              for followers in PHONOTACTICS.followers]
+
+
+class WordformSpace:
+    """All the legal wordforms with n syllables, without building them all.
+
+    The wordforms are in a fixed order (the same order as nested loops
+    over SYLLABLES), and can be counted, indexed, enumerated and sampled.
+    Only a small table of counts is kept: for each number of syllables
+    still to come, and each state of PHONOTACTICS the word could be in,
+    how many ways there are to finish the word.
+    """
+
+    def __init__(self, n:int):
+        if n < 1:
+            raise ValueError(f"Wordforms need at least one syllable, not {n}.")
+        self.n = n
+        states = range(len(_FOLLOWERS))
+        # ways[k][state]: ways to add k more syllables from the state.
+        self.ways = [[1 for _ in states]]
+        for k in range(1, n + 1):
+            self.ways.append([sum(self.ways[k-1][j] for _, j in _FOLLOWERS[q])
+                              for q in states])
+        self.size = self.ways[n][PHONOTACTICS.start]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i:int):
+        """The i-th wordform."""
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError(f"No wordform {i} of {self.size}.")
+        syllables = []
+        state = PHONOTACTICS.start
+        for remaining in range(self.n - 1, -1, -1):
+            for s, following in _FOLLOWERS[state]:
+                ways = self.ways[remaining][following]
+                if i < ways:
+                    break
+                i -= ways
+            syllables.append(s)
+            state = following
+        return Wordform(syllables=syllables)
+
+    def index(self, wordform):
+        """The position of the given wordform. The inverse of [i].
+
+        If it isn't in this space, raise a ValueError.
+        """
+        if len(wordform.syllables) != self.n:
+            raise ValueError(f"Not {self.n} syllables: {wordform}")
+        i = 0
+        state = PHONOTACTICS.start
+        for remaining, syl in zip(range(self.n - 1, -1, -1),
+                                  wordform.syllables):
+            for s, following in _FOLLOWERS[state]:
+                if s is syl:
+                    break
+                i += self.ways[remaining][following]
+            else:
+                raise ValueError(f"Not a legal wordform: {wordform}")
+            state = following
+        return i
+
+    def __iter__(self):
+        """Every wordform, in order, one at a time."""
+        # a stack of iterators over the candidates for each syllable.
+        syllables = []
+        stack = [iter(_FOLLOWERS[PHONOTACTICS.start])]
+        while stack:
+            s, state = next(stack[-1], (None, None))
+            if s is None:
+                stack.pop()
+                if syllables:
+                    syllables.pop()
+                continue
+            if len(stack) == self.n:
+                yield Wordform(syllables=syllables + [s])
+            else:
+                syllables.append(s)
+                stack.append(iter(_FOLLOWERS[state]))
+
+    def sample(self, rng):
+        """A uniformly random wordform, using the given random.Random."""
+        return self[rng.randrange(self.size)]
+
+
+# the inventories of wordforms, built by _build() on first use.
+_LAZY = ('WORDFORMS_1SYL', 'WORDFORMS_2SYL', 'WORDFORMS')
+
+
+def _build():
+    """Build every wordform with one or two syllables."""
+    global WORDFORMS_1SYL, WORDFORMS_2SYL, WORDFORMS
+    # all one-syllable words.
+    WORDFORMS_1SYL = [Wordform(syllables=[s]) for s in syllable.SYLLABLES]
+    # all two-syllable words.
+    WORDFORMS_2SYL = list(WordformSpace(2))
+    WORDFORMS = WORDFORMS_1SYL + WORDFORMS_2SYL
+    # every wordform in WORDFORMS knows its own position in it.
+    for i, wf in enumerate(WORDFORMS):
+        wf.index = i
 
-# build all two-syllable words.
-WORDFORMS_2SYL = []
-for s1 in SYLLABLES:
-    for s2 in SYLLABLES:
-        # can't have onsetless syllable mid-word.
-        if s2.onset == '':
-            continue
-        # can't have n before m or n.
-        if s1.coda == 'n' and s2.onset in ['m', 'n']:
-            continue
-        WORDFORMS_2SYL.append(Wordform(syllables=[s1, s2]))
 
-WORDFORMS = WORDFORMS_1SYL + WORDFORMS_2SYL
\ No newline at end of file
+def __getattr__(name):
+    """Build the inventories the first time one is used, and keep them."""
+    if name in _LAZY:
+        _build()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")